@@ -0,0 +1,58 @@
+# Run a benchmark with the vendored xlwt of an earlier revision and with the
+# one of the working tree. Two versions of xlwt can't be imported in one
+# process, so the benchmark script runs once per version in a child process,
+# with the Modules folder to import from in its environment. The folder of
+# the earlier revision is extracted with git archive into a temporary folder.
+
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = 'commands/exportBOM/Modules'
+
+# The commit the xlwt optimizations started from, the default revision to
+# compare with. It is the full hash of the baseline commit of the repository,
+# which rebasing or squashing the later commits doesn't change.
+BASELINE_REVISION = 'bbf33f6db6b63eac9e8342362156d1381dc94664'
+
+# Environment of the child processes
+MODULES_VARIABLE = 'BENCHMARK_MODULES'
+LABEL_VARIABLE = 'BENCHMARK_LABEL'
+
+
+def extract_modules(revision, folder):
+    "Extract the Modules folder of a revision into folder and return its path"
+    archive = subprocess.run(['git', 'archive', revision, MODULES], cwd=ROOT, check=True,
+                             stdout=subprocess.PIPE).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(folder)
+    return os.path.join(folder, *MODULES.split('/'))
+
+
+def run(script, measure):
+    """Compare the xlwt of a revision with the one of the working tree.
+
+    The revision is the first command line argument, BASELINE_REVISION when
+    there's none. measure(label) is called in each child process, once
+    xlwt can be imported.
+    """
+    modules = os.environ.get(MODULES_VARIABLE)
+    if modules:
+        sys.path.insert(0, modules)
+        measure(os.environ[LABEL_VARIABLE])
+        return
+
+    revision = sys.argv[1] if len(sys.argv) > 1 else BASELINE_REVISION
+    with tempfile.TemporaryDirectory() as folder:
+        versions = [
+            (f'baseline {revision[:12]}', extract_modules(revision, folder)),
+            ('current', os.path.join(ROOT, *MODULES.split('/'))),
+        ]
+        for label, modules in versions:
+            env = dict(os.environ, **{MODULES_VARIABLE: modules, LABEL_VARIABLE: label})
+            subprocess.run([sys.executable, script], env=env, check=True)
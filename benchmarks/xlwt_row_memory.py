@@ -0,0 +1,45 @@
+# Memory held by the cells of xlwt rows before the workbook is saved.
+#
+#     python benchmarks/xlwt_row_memory.py [REVISION]
+#
+# compares the working tree with REVISION, by default the baseline commit,
+# whose rows keep a Cell object per cell. The memory is measured with
+# tracemalloc once all the cells are written, then the BIFF data of the
+# workbook is built.
+
+import time
+import tracemalloc
+
+import baseline
+
+# (name, rows, write the cells of a row)
+SHEETS = [
+    ('20000 rows x 5 cells', 20000, lambda ws, r: (
+        ws.write(r, 0, 'LCF8-8080-%d' % (r % 300)), ws.write(r, 1, r % 17), ws.write(r, 2, r * 0.25),
+        ws.write(r, 3, 'cm'), ws.write(r, 4, r * 1.1))),
+    ('2000 rows x 50 cells', 2000, lambda ws, r: [
+        ws.write(r, c, 'p%d' % c if c % 5 == 0 else r * c * 0.5) for c in range(50)]),
+]
+
+
+def measure(label):
+    import xlwt
+
+    for name, rows, write_row in SHEETS:
+        wb = xlwt.Workbook()
+        ws = wb.add_sheet('BOM')
+        tracemalloc.start()
+        start = time.perf_counter()
+        for r in range(rows):
+            write_row(ws, r)
+        held = tracemalloc.get_traced_memory()[0]
+        written = time.perf_counter()
+        tracemalloc.stop()
+        wb.get_biff_data()
+        done = time.perf_counter()
+        print(f'{label:>20}  {name}: cells held in {held / 1e6:.1f} MB, '
+              f'write {written - start:.2f}s, BIFF data {done - written:.2f}s')
+
+
+if __name__ == '__main__':
+    baseline.run(__file__, measure)
@@ -0,0 +1,97 @@
+# Shared string table of a workbook with many unique part numbers.
+#
+#     python benchmarks/xlwt_sst.py [REVISION]
+#
+# compares the working tree with REVISION, by default the baseline commit,
+# whose SST is assembled string by string. For each count of unique strings it times
+# SharedStringTable.add_str and get_biff_record, measures the peak memory
+# of the table with tracemalloc, and times writing and saving a workbook
+# holding the strings.
+
+import gc
+import io
+import time
+import tracemalloc
+
+import baseline
+
+# Counts of unique strings
+COUNTS = (10 ** 5, 10 ** 6)
+
+# The best of this many runs is reported
+REPEAT = 3
+
+# Cells of each row of the saved workbook
+COLUMNS = 20
+
+
+def _part_numbers(count):
+    return ['LCF8-8080-%07d' % i for i in range(count)]
+
+
+def time_sst(parts):
+    "Best add_str and get_biff_record times"
+    from xlwt.BIFFRecords import SharedStringTable
+
+    best = None
+    for _ in range(REPEAT):
+        gc.collect()
+        start = time.perf_counter()
+        sst = SharedStringTable('ascii')
+        for part in parts:
+            sst.add_str(part)
+        added = time.perf_counter()
+        sst.get_biff_record()
+        built = time.perf_counter()
+        times = (added - start, built - added)
+        if best is None or sum(times) < sum(best):
+            best = times
+    return best
+
+
+def peak_memory(parts):
+    "Peak memory of adding the strings and building the records"
+    from xlwt.BIFFRecords import SharedStringTable
+
+    gc.collect()
+    tracemalloc.start()
+    sst = SharedStringTable('ascii')
+    for part in parts:
+        sst.add_str(part)
+    sst.get_biff_record()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def time_save(parts):
+    "Best time of writing the strings in a sheet and saving the workbook"
+    import xlwt
+
+    best = None
+    for _ in range(REPEAT):
+        gc.collect()
+        start = time.perf_counter()
+        # Cell by cell, the baseline has no bulk writes
+        wb = xlwt.Workbook(encoding='ascii')
+        ws = wb.add_sheet('BOM')
+        for i, part in enumerate(parts):
+            ws.write(i // COLUMNS, i % COLUMNS, part)
+        wb.save(io.BytesIO())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure(label):
+    for count in COUNTS:
+        parts = _part_numbers(count)
+        add, build = time_sst(parts)
+        peak = peak_memory(parts)
+        save = time_save(parts)
+        print(f'{label:>20}  {count} strings: add_str {add:.3f}s, get_biff_record {build:.3f}s, '
+              f'peak {peak / 1e6:.1f} MB, write+save {save:.2f}s')
+
+
+if __name__ == '__main__':
+    baseline.run(__file__, measure)
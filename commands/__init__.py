@@ -3,28 +3,44 @@
 # TODO Import the modules corresponding to the commands you created.
 # If you want to add an additional command, duplicate one of the existing directories and import it here.
 # You need to use aliases (import "entry" as "my_module") assuming you have the default module named "entry".
-from .buildPedestal import entry as buildPedestal
-from .exportDrawings import entry as exportDrawings
-from .exportBOM import entry as exportBOM
+# The imports are timed so the startup cost of each command is logged, heavy
+# libraries are only loaded by the commands when they are executed.
+import time
+from ..lib import fusion360utils as futil
+_startup = time.perf_counter()
+buildPedestal = futil.timed_import('.buildPedestal.entry', __name__)
+buildFrame = futil.timed_import('.buildFrame.entry', __name__)
+exportDrawings = futil.timed_import('.exportDrawings.entry', __name__)
+exportBOM = futil.timed_import('.exportBOM.entry', __name__)
+batchPedestal = futil.timed_import('.batchPedestal.entry', __name__)
+exportAll = futil.timed_import('.exportAll.entry', __name__)
+from . import export_worker
 
 # TODO add your imported modules to this list.
 # Fusion will automatically call the start() and stop() functions.
 commands = [
     buildPedestal,
+    buildFrame,
     exportDrawings,
-    exportBOM
+    exportBOM,
+    batchPedestal,
+    exportAll
 ]
 
 
 # Assumes you defined a "start" function in each of your modules.
 # The start function will be run when the add-in is started.
 def start():
+    # The export commands hand their file work to the background pool
+    export_worker.start()
     for command in commands:
         command.start()
+    futil.log_import_times(f'Commands started in {(time.perf_counter() - _startup) * 1000:.1f} ms, import times')
 
 
 # Assumes you defined a "stop" function in each of your modules.
 # The stop function will be run when the add-in is stopped.
 def stop():
     for command in commands:
-        command.stop()
\ No newline at end of file
+        command.stop()
+    export_worker.stop()
\ No newline at end of file
@@ -0,0 +1,274 @@
+import adsk.core, adsk.fusion, adsk.cam, traceback
+import os
+import csv
+import time
+
+from ..buildPedestal import entry as buildPedestal
+from ..buildPedestal import clearance
+from ..buildPedestal import state as pedestalState
+from ..exportBOM import entry as exportBOM
+from ..exportDrawings import entry as exportDrawings
+from .. import export_worker
+
+from ...lib import fusion360utils as futil
+from ... import config
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# *** Specify the command identity information. ***
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_BatchPedestal'
+CMD_NAME = 'Batch Build Pedestals'
+CMD_Description = 'Build DeepClaw Pedestals for every dimension set of an Excel sheet and export their BOM and drawings'
+
+# Specify that the command will be promoted to the panel.
+IS_PROMOTED = False
+
+# *** Define the location where the command button will be created. ***
+# This is done by specifying the workspace, the tab, and the panel, and the
+# command it will be inserted beside. Not providing the command to position
+# it will insert it at the end.
+WORKSPACE_ID = 'FusionSolidEnvironment'
+PANEL_ID = 'SolidScriptsAddinsPanel'
+COMMAND_BESIDE_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_BOM'
+
+# Resource location for command icons, here we assume a sub folder in this directory named "resources".
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
+
+# Gap between two variants placed side by side in the design (cm)
+VARIANT_GAP = 50.0
+
+# Name of the timing report written in the output folder
+REPORT_NAME = 'batch_report.csv'
+# Name of the timing records of the build and export steps
+TIMINGS_NAME = 'batch_timings.json'
+
+# Status of a variant in the report
+STATUS_BUILT = 'built'
+STATUS_BUILD_FAILED = 'build failed'
+STATUS_EXPORT_FAILED = 'export failed'
+
+# The sheet and the output folder chosen by the user
+_batch_files = {'sheet': '', 'folder': ''}
+
+# Executed when add-in is run.
+def start():
+    try:
+        # Create a command Definition.
+        cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
+
+        # Define an event handler for the command created event.
+        # It will be called when button is clicked.
+        futil.add_handler(cmd_def.commandCreated, command_created)
+
+        # **** Add a button into the UI so the user can run the command. ****
+        # Get the target workspace the button will be created in.
+        workspace = ui.workspaces.itemById(WORKSPACE_ID)
+
+        # Get the panel the button will be created in.
+        panel = workspace.toolbarPanels.itemById(PANEL_ID)
+
+        # Create the button command control in the UI after the specified existing command.
+        control = panel.controls.addCommand(cmd_def, COMMAND_BESIDE_ID, False)
+
+        # Specify if the command is promoted to the main toolbar
+        control.isPromoted = IS_PROMOTED
+    except:
+        if ui:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+# Executed when add-in is stopped
+def stop():
+    try:
+        # Get the various UI elements for this command
+        workspace = ui.workspaces.itemById(WORKSPACE_ID)
+        panel = workspace.toolbarPanels.itemById(PANEL_ID)
+        command_control = panel.controls.itemById(CMD_ID)
+        command_definition = ui.commandDefinitions.itemById(CMD_ID)
+
+        # Delete the button command control
+        if command_control:
+            command_control.deleteMe()
+
+        # Delete the command definition
+        if command_definition:
+            command_definition.deleteMe()
+    except:
+        if ui:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    try:
+        # General logging for debug
+        futil.log(f'{CMD_NAME} Command Created Event')
+
+        # Ask user for the sheet with the dimension sets
+        fileDialog = ui.createFileDialog()
+        fileDialog.isMultiSelectEnabled = False
+        fileDialog.title = "Select the dimension sets"
+        fileDialog.filter = 'Excel files (*.xls)'
+        fileDialog.filterIndex = 0
+        dialogResult = fileDialog.showOpen()
+        if dialogResult == adsk.core.DialogResults.DialogOK:
+            _batch_files['sheet'] = fileDialog.filename
+        else:
+            return
+
+        # Ask user for the folder of the BOMs and drawings
+        folderDialog = ui.createFolderDialog()
+        folderDialog.title = "Select the output folder"
+        dialogResult = folderDialog.showDialog()
+        if dialogResult == adsk.core.DialogResults.DialogOK:
+            _batch_files['folder'] = folderDialog.folder
+        else:
+            return
+
+        # Connect to the events that are need by this command.
+        futil.add_handler(args.command.execute, command_execute, command=args.command)
+
+    except:
+        if ui:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+def command_execute(args: adsk.core.CommandEventArgs):
+    try:
+        variants = read_variants(_batch_files['sheet'])
+        if not variants:
+            ui.messageBox("No dimension set found in the sheet!")
+            return
+
+        # Check every dimension set before the first pedestal is built
+        invalid = []
+        for name, depth, length, height in variants:
+            problems = clearance.check_pedestal(depth, length, height)
+            if problems:
+                invalid.append(f'{name}: {problems[0]}' + (f' (and {len(problems) - 1} more)' if len(problems) > 1 else ''))
+        if invalid:
+            ui.messageBox('These dimension sets can\'t be built:\n' + '\n'.join(invalid))
+            return
+
+        exportBOM.load_libraries()
+        exportDrawings.load_libraries()
+        report = generate_batch(variants, _batch_files['folder'])
+        total = sum(row['build'] for row in report)
+        failed = [row['name'] for row in report if row['status'] == STATUS_BUILD_FAILED]
+        message = f'{len(report) - len(failed)} pedestals generated in {total:.1f} s.\n'
+        if failed:
+            message += f'{len(failed)} failed and weren\'t exported: {", ".join(failed)}\n'
+        ui.messageBox(message +
+                      f'The BOMs and drawings are exported in the background, '
+                      f'see {REPORT_NAME} and {TIMINGS_NAME} in the output folder for the status and timing of each variant and step.')
+    except:
+        if ui:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+def read_variants(filename):
+    """Read the dimension sets from the first sheet of an .xls file.
+
+    Each row is either 'name, depth, length, height' or 'depth, length,
+    height', with the dimensions in cm. Rows whose dimensions aren't numbers,
+    like a header, are skipped.
+    """
+    # xlrd is loaded when a sheet is first read instead of when the add-in starts
+    xlrd = futil.timed_import('..exportBOM.Modules.xlrd', __package__)
+    book = xlrd.open_workbook(filename)
+    sheet = book.sheet_by_index(0)
+    variants = []
+    for i in range(sheet.nrows):
+        values = [value for value in sheet.row_values(i) if value != '']
+        if len(values) == 4:
+            name, dims = values[0], values[1:]
+            if isinstance(name, float) and name.is_integer():
+                name = int(name)
+            name = str(name)
+        elif len(values) == 3:
+            name, dims = f'Variant {len(variants) + 1}', values
+        else:
+            continue
+        try:
+            depth, length, height = (float(value) for value in dims)
+        except ValueError:
+            continue
+        variants.append((name, depth, length, height))
+    return variants
+
+def generate_batch(variants, folder):
+    """Build every variant in its own component and export its BOM and drawing.
+
+    The STEP parts are imported once for the whole batch, the next variants
+    reuse the components through the component cache of buildPedestal. The
+    BOMs and drawings are written by the export worker pool while the next
+    variants are built. A variant whose build fails is reported without
+    exporting its files. Returns the report, which is written as a CSV file
+    in the folder once all the files are exported.
+    """
+    design = adsk.fusion.Design.cast(app.activeProduct)
+    rootComp = design.rootComponent
+
+    report = []
+    exports = {'pending': 0, 'submitted': False}
+
+    def exportDone(row, stage):
+        def callback(job):
+            row[stage] = job.elapsed
+            if job.error:
+                row['status'] = STATUS_EXPORT_FAILED
+            row['total'] = row['build'] + row['bom'] + row['drawing']
+            exports['pending'] -= 1
+            if exports['pending'] == 0 and exports['submitted']:
+                write_report(report, folder)
+        return callback
+
+    fileNames = pedestalState.file_names([name for name, depth, length, height in variants])
+    offset = 0.0
+    for (name, depth, length, height), fileName in zip(variants, fileNames):
+        start = time.perf_counter()
+
+        # Create the component of the variant, next to the previous one
+        trans = adsk.core.Matrix3D.create()
+        trans.translation = adsk.core.Vector3D.create(offset, 0.0, 0.0)
+        variantComp = rootComp.occurrences.addNewComponent(trans).component
+        variantComp.name = f'DeepClaw Pedestal {name}'
+        offset += length + 8 + VARIANT_GAP
+
+        # generateBase reports its own errors and returns None
+        build = buildPedestal.generateBase(depth, length, height, variantComp)
+        built = time.perf_counter()
+
+        row = {
+            'name': name,
+            'status': STATUS_BUILT if build is not None else STATUS_BUILD_FAILED,
+            'depth': depth,
+            'length': length,
+            'height': height,
+            'build': built - start,
+            'bom': 0.0,
+            'drawing': 0.0,
+            'total': built - start,
+        }
+        report.append(row)
+        futil.log(f"{CMD_NAME} {name}: {row['status']} in {row['build']:.2f}s")
+        if build is None:
+            continue
+
+        # Export the files in the background
+        fileName = os.path.join(folder, fileName)
+        exports['pending'] += 2
+        export_worker.submit(name + '.xls', exportBOM.write_BOM, length, depth, height, fileName + '.xls',
+                             callback=exportDone(row, 'bom'))
+        export_worker.submit(name + '.pdf', exportDrawings.write_drawing, length, depth, height, fileName + '.pdf',
+                             callback=exportDone(row, 'drawing'))
+
+    exports['submitted'] = True
+    if exports['pending'] == 0:
+        write_report(report, folder)
+    return report
+
+def write_report(report, folder):
+    "Write the timing of each variant as a CSV file"
+    with open(os.path.join(folder, REPORT_NAME), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(report[0]))
+        writer.writeheader()
+        writer.writerows(report)
+    futil.export_timings(os.path.join(folder, TIMINGS_NAME))
+    futil.log_timings(f'{CMD_NAME} timings')
+    futil.log(f'{CMD_NAME} report written to {REPORT_NAME} and {TIMINGS_NAME}')
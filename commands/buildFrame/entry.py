@@ -0,0 +1,124 @@
+import adsk.core, adsk.fusion, adsk.cam, traceback
+import os
+
+from ..buildPedestal import entry as buildPedestal
+from ..buildPedestal import frame
+from ..buildPedestal import clearance
+
+from ...lib import fusion360utils as futil
+from ... import config
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# *** Specify the command identity information. ***
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_BuildFrame'
+CMD_NAME = 'Build Frame'
+CMD_Description = 'Build a frame of LCF8-8080 extrusions from a JSON description of its joints and beams'
+
+# Specify that the command will be promoted to the panel.
+IS_PROMOTED = False
+
+# *** Define the location where the command button will be created. ***
+# This is done by specifying the workspace, the tab, and the panel, and the
+# command it will be inserted beside. Not providing the command to position
+# it will insert it at the end.
+WORKSPACE_ID = 'FusionSolidEnvironment'
+PANEL_ID = 'SolidScriptsAddinsPanel'
+COMMAND_BESIDE_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_Pedestal'
+
+# Resource location for command icons, here we assume a sub folder in this directory named "resources".
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
+
+# The frame description chosen by the user
+_frame_files = {'description': ''}
+
+# Executed when add-in is run.
+def start():
+    try:
+        # Create a command Definition.
+        cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
+
+        # Define an event handler for the command created event.
+        # It will be called when button is clicked.
+        futil.add_handler(cmd_def.commandCreated, command_created)
+
+        # **** Add a button into the UI so the user can run the command. ****
+        # Get the target workspace the button will be created in.
+        workspace = ui.workspaces.itemById(WORKSPACE_ID)
+
+        # Get the panel the button will be created in.
+        panel = workspace.toolbarPanels.itemById(PANEL_ID)
+
+        # Create the button command control in the UI after the specified existing command.
+        control = panel.controls.addCommand(cmd_def, COMMAND_BESIDE_ID, False)
+
+        # Specify if the command is promoted to the main toolbar
+        control.isPromoted = IS_PROMOTED
+    except:
+        if ui:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+# Executed when add-in is stopped
+def stop():
+    try:
+        # Get the various UI elements for this command
+        workspace = ui.workspaces.itemById(WORKSPACE_ID)
+        panel = workspace.toolbarPanels.itemById(PANEL_ID)
+        command_control = panel.controls.itemById(CMD_ID)
+        command_definition = ui.commandDefinitions.itemById(CMD_ID)
+
+        # Delete the button command control
+        if command_control:
+            command_control.deleteMe()
+
+        # Delete the command definition
+        if command_definition:
+            command_definition.deleteMe()
+    except:
+        if ui:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    try:
+        # General logging for debug
+        futil.log(f'{CMD_NAME} Command Created Event')
+
+        # Ask user for the description of the frame
+        fileDialog = ui.createFileDialog()
+        fileDialog.isMultiSelectEnabled = False
+        fileDialog.title = "Select the frame description"
+        fileDialog.filter = 'JSON files (*.json)'
+        fileDialog.filterIndex = 0
+        dialogResult = fileDialog.showOpen()
+        if dialogResult == adsk.core.DialogResults.DialogOK:
+            _frame_files['description'] = fileDialog.filename
+        else:
+            return
+
+        # Connect to the events that are need by this command.
+        futil.add_handler(args.command.execute, command_execute, command=args.command)
+
+    except:
+        if ui:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+def command_execute(args: adsk.core.CommandEventArgs):
+    try:
+        nodes, edges = frame.load_frame(_frame_files['description'])
+        try:
+            # Check the whole graph before anything is created in the design
+            framePlan = frame.plan_frame(nodes, edges)
+        except ValueError as error:
+            ui.messageBox(f'Invalid frame description:\n{error}')
+            return
+        problems = clearance.check_frame(framePlan)
+        if problems:
+            ui.messageBox('The frame can\'t be built:\n' + '\n'.join(problems))
+            return
+
+        buildPedestal.generateFrame(nodes, edges)
+        lines = '\n'.join(f'{line.part}: {line.quantity}' for line in framePlan.bom)
+        ui.messageBox(f'Frame built with {len(framePlan.beams)} beams.\n{lines}')
+    except:
+        if ui:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
@@ -0,0 +1,179 @@
+# Headless interference check of planned assemblies.
+#
+# Every planned occurrence gets the axis-aligned bounding box of its part,
+# moved by its planned transform. The boxes are indexed in a spatial hash,
+# so only the boxes sharing a cell are compared and large batches are
+# checked in milliseconds. Like plan.py, this module does not import adsk:
+# plans are checked before anything is created in Fusion 360.
+
+import math
+from typing import NamedTuple, Tuple
+
+from . import plan
+
+# Bounding boxes of the STEP parts in their own coordinates (cm), read from
+# the files in importFiles. GD-60-F.step isn't shipped, so wheels aren't checked.
+PART_ENVELOPES = {
+    'ASSF-CAP-LCEC8_8080_B.step': ((-4.0, -4.0, 0.0), (4.0, 4.0, 0.4)),
+    'ASSF-CONN-E8080.step': ((-7.057, -2.513, -5.279), (7.057, 3.27, 5.279)),
+    'ASSF-RFP-UR5_AUBOi5_FrankEmika-200_200_20.step': ((-10.0, 0.0, -10.0), (10.0, 1.6, 10.0)),
+    'LBSB8-8080.step': ((-3.9, -0.3, -0.3), (3.9, 7.8, 8.55)),
+}
+
+# Half width of the extrusion profile, centered on the sketch origin (cm)
+PROFILE_HALF = 4.0
+
+# Direction each sketch plane extrudes along
+_PLANE_AXES = {'xY': 2, 'xZ': 1, 'yZ': 0}
+
+# Overlaps thinner than this are contacts, not interferences (cm)
+TOLERANCE = 0.05
+
+# Depth of the keys of the LBSB8-8080 brackets in the slots of the profile (cm)
+BRACKET_KEY_DEPTH = 0.3
+
+# Edge of the cells of the spatial hash (cm)
+CELL_SIZE = 20.0
+
+
+class Box(NamedTuple):
+    role: str
+    component: str
+    low: Tuple[float, float, float]
+    high: Tuple[float, float, float]
+
+
+class Interference(NamedTuple):
+    a: str          # role of the first occurrence
+    b: str          # role of the second occurrence
+    depth: float    # smallest overlap along the three axes (cm)
+
+
+def envelope(compSpec):
+    "Bounding box of a component in its own coordinates, None if it isn't known"
+    if compSpec.is_extrusion:
+        low = [-PROFILE_HALF] * 3
+        high = [PROFILE_HALF] * 3
+        axis = _PLANE_AXES[compSpec.plane]
+        low[axis], high[axis] = 0.0, compSpec.distance
+        return tuple(low), tuple(high)
+    return PART_ENVELOPES.get(compSpec.source)
+
+
+def _transform_box(matrix, low, high):
+    "World bounding box of a local box moved by a 4x4 transform"
+    worldLow = []
+    worldHigh = []
+    for row in range(3):
+        m = matrix[row * 4: row * 4 + 4]
+        a = m[3]
+        b = m[3]
+        # The extremes of each world coordinate come from the extremes of each term
+        for k in range(3):
+            u, v = m[k] * low[k], m[k] * high[k]
+            a += min(u, v)
+            b += max(u, v)
+        worldLow.append(a)
+        worldHigh.append(b)
+    return tuple(worldLow), tuple(worldHigh)
+
+
+def boxes(assemblyPlan):
+    "World bounding boxes of the occurrences of a plan whose part envelope is known"
+    envelopes = {comp.key: envelope(comp) for comp in assemblyPlan.components}
+    result = []
+    for occ in assemblyPlan.occurrences:
+        local = envelopes.get(occ.component)
+        if local is not None:
+            result.append(Box(occ.role, occ.component, *_transform_box(occ.transform, *local)))
+    return result
+
+
+def _cells(box, size):
+    ranges = [range(math.floor(lo / size), math.floor(hi / size) + 1) for lo, hi in zip(box.low, box.high)]
+    return ((i, j, k) for i in ranges[0] for j in ranges[1] for k in ranges[2])
+
+
+def interferences(assemblyPlan, tolerance=TOLERANCE, cellSize=CELL_SIZE, allowed=()):
+    """The pairs of occurrences of a plan whose bounding boxes overlap.
+
+    allowed is a collection of frozensets of two component keys whose parts
+    are meant to overlap, like a connector bolted into the slot of a profile.
+    """
+    grid = {} # cell -> indices of the boxes in it
+    planBoxes = boxes(assemblyPlan)
+    for index, box in enumerate(planBoxes):
+        for cell in _cells(box, cellSize):
+            grid.setdefault(cell, []).append(index)
+
+    found = []
+    checked = set()
+    for indices in grid.values():
+        for n, i in enumerate(indices):
+            for j in indices[n + 1:]:
+                if (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                a, b = planBoxes[i], planBoxes[j]
+                if frozenset((a.component, b.component)) in allowed:
+                    continue
+                depth = min(min(a.high[k], b.high[k]) - max(a.low[k], b.low[k]) for k in range(3))
+                if depth > tolerance:
+                    found.append(Interference(a.role, b.role, depth))
+    return found
+
+
+# The pedestal whose overlapping parts are the contacts of the design, like
+# the brackets bolted into the slots of the extrusions
+REFERENCE_DIMENSIONS = (60.0, 80.0, 70.0)
+
+# Smallest and largest value of each dimension (cm). Below the minimums the
+# cross beams run into each other and the post brackets, which reach 11.8 cm
+# up the posts, stick out of them. The maximums bound the pedestal to the
+# sizes it is designed for.
+DIMENSION_LIMITS = {
+    'depth': (52.0, 200.0),
+    'length': (60.0, 200.0),
+    'height': (12.0, 200.0),
+}
+
+_contacts = {}
+
+
+def _reference_contacts():
+    "Role pairs overlapping in the reference pedestal"
+    if 'pairs' not in _contacts:
+        reference = plan.plan_pedestal(*REFERENCE_DIMENSIONS)
+        _contacts['pairs'] = frozenset(frozenset((found.a, found.b)) for found in interferences(reference))
+    return _contacts['pairs']
+
+
+def check_pedestal(depth, length, height):
+    """The problems of a dimension set, an empty list if the pedestal can be built.
+
+    The dimensions must be within DIMENSION_LIMITS, and no parts may overlap
+    except the ones which already touch in the reference pedestal.
+    """
+    problems = []
+    for name, value in zip(plan.DIMENSIONS, (depth, length, height)):
+        low, high = DIMENSION_LIMITS[name]
+        if not low <= value <= high:
+            problems.append(f'The {name} must be between {low:g} and {high:g} cm')
+    if problems:
+        return problems
+
+    contacts = _reference_contacts()
+    for found in interferences(plan.cached_plan(depth, length, height)):
+        if frozenset((found.a, found.b)) not in contacts:
+            problems.append(f'{found.a} and {found.b} overlap by {found.depth:.1f} cm')
+    return problems
+
+
+def check_frame(framePlan):
+    """The problems of a frame plan, an empty list if the frame can be built.
+
+    The brackets are keyed into the slots of the beams they join, so
+    overlaps up to the depth of their keys are contacts.
+    """
+    return [f'{found.a} and {found.b} overlap by {found.depth:.1f} cm'
+            for found in interferences(framePlan, tolerance=TOLERANCE + BRACKET_KEY_DEPTH)]
@@ -0,0 +1,85 @@
+# Import-once cache of the STEP parts used by the pedestal.
+#
+# Importing a STEP file is the slowest part of a rebuild. The first import of
+# a file in a design is kept, and the next requests of the same file in that
+# design add a new occurrence of the existing component instead.
+
+import hashlib
+import os
+import time
+
+from ...lib import fusion360utils as futil
+
+
+class ComponentCache:
+    def __init__(self):
+        self._components = {} # (path, content hash) -> components imported from the file
+        self._hashes = {} # path -> (mtime, size, content hash)
+        self.hits = 0
+        self.misses = 0
+        self.import_time = 0.0 # seconds spent importing on misses
+        self.reuse_time = 0.0 # seconds spent adding existing components on hits
+
+    def key(self, path):
+        "Cache key of a file: its absolute path plus the hash of its content"
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        cached = self._hashes.get(path)
+        if cached is None or cached[:2] != (stat.st_mtime, stat.st_size):
+            digest = hashlib.sha1()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            cached = (stat.st_mtime, stat.st_size, digest.hexdigest())
+            self._hashes[path] = cached
+        return (path, cached[2])
+
+    def get(self, path, design):
+        "The component imported from the file in the design, or None"
+        components = self._components.get(self.key(path), [])
+        # Forget the components that have been deleted or whose document was closed
+        components[:] = [comp for comp in components if comp.isValid]
+        for comp in components:
+            if comp.parentDesign == design:
+                return comp
+        return None
+
+    def put(self, path, component):
+        self._components.setdefault(self.key(path), []).append(component)
+
+    def add_occurrence(self, importManager, path, targetComp, transform):
+        """Add an occurrence of the part in the target component.
+
+        The file is only imported when no component from it exists in the
+        design of the target yet.
+        """
+        start = time.perf_counter()
+        occurrences = targetComp.occurrences
+        component = self.get(path, targetComp.parentDesign)
+        if component is not None:
+            occ = occurrences.addExistingComponent(component, transform)
+            self.hits += 1
+            self.reuse_time += time.perf_counter() - start
+            return occ
+
+        stepImpOpt = importManager.createSTEPImportOptions(path)
+        with futil.timed('importToTarget STEP'):
+            importManager.importToTarget(stepImpOpt, targetComp)
+        occ = occurrences.item(occurrences.count - 1)
+        if not occ.transform.isEqualTo(transform):
+            occ.transform = transform
+        self.put(path, occ.component)
+        self.misses += 1
+        self.import_time += time.perf_counter() - start
+        return occ
+
+    def clear(self):
+        self._components.clear()
+
+    def report(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'import_time': self.import_time,
+            'reuse_time': self.reuse_time,
+        }
@@ -1,10 +1,18 @@
 
 import adsk.core, adsk.fusion, adsk.cam, traceback
+import contextlib
 import os
-import math
+import threading
 
 from ...lib import fusion360utils as futil
 from ... import config
+from . import plan
+from . import frame
+from . import clearance
+from .component_cache import ComponentCache
+from .profile_cache import ProfileCache
+from .registry import OccurrenceRegistry, new_pedestal_id
+from . import state as pedestalState
 app = adsk.core.Application.get()
 ui = app.userInterface
 
@@ -27,9 +35,29 @@ COMMAND_BESIDE_ID = 'ScriptsManagerCommand'
 # Resource location for command icons, here we assume a sub folder in this directory named "resources".
 ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
 
-# Local list of event handlers used to maintain a reference so
-# they are not released and garbage collected.
-local_handlers = []
+# Location of the DXF profile and the STEP parts used by the pedestal.
+IMPORT_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'importFiles')
+
+# The preview is drawn once the dimensions are left unchanged for this many seconds
+PREVIEW_DELAY = 0.3
+PREVIEW_EVENT_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_PedestalPreview'
+PREVIEW_COLOR = (120, 160, 220)
+
+# The command being edited, the count of its input changes, whether the preview of the
+# last change is due, the pending preview timer and the custom graphics of the last preview
+_preview = {'command': None, 'generation': 0, 'due': True, 'timer': None, 'graphics': None}
+
+# The STEP parts imported in each design, shared by all the builds of the session.
+componentCache = ComponentCache()
+
+# The DXF profile sketch imported in each design, copied for the next extrusions.
+profileCache = ProfileCache()
+
+# The pedestals built in this session, used to update a pedestal in place.
+pedestalBuilds = []
+
+# Index of the built occurrences by pedestal and role.
+occurrenceRegistry = OccurrenceRegistry()
 
 # Executed when add-in is run.
 def start():
@@ -40,6 +68,10 @@ def start():
         # Define an event handler for the command created event.
         # It will be called when button is clicked.
         futil.add_handler(cmd_def.commandCreated, command_created)
+
+        # The preview timer fires this event to draw the preview on the UI thread
+        previewEvent = app.registerCustomEvent(PREVIEW_EVENT_ID)
+        futil.add_handler(previewEvent, preview_due)
         
         # **** Add a button into the UI so the user can run the command. ****
         # Get the target workspace the button will be created in.
@@ -73,6 +105,8 @@ def stop():
         # Delete the command definition
         if command_definition:
             command_definition.deleteMe()
+
+        app.unregisterCustomEvent(PREVIEW_EVENT_ID)
     except:
         if ui:
             ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
@@ -86,15 +120,34 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
         # Create inputs
         inputs = args.command.commandInputs
 
+        # The dialog starts with the dimensions of the reference pedestal
+        refDepth, refLength, refHeight = clearance.REFERENCE_DIMENSIONS
+
         # Create the value input to get the depth
-        depth = inputs.addValueInput('depthValue', 'Depth Value', 'cm', adsk.core.ValueInput.createByReal(0))
+        depth = inputs.addValueInput('depthValue', 'Depth Value', 'cm', adsk.core.ValueInput.createByReal(refDepth))
         # Create the value input to get the length
-        length = inputs.addValueInput('lengthValue', 'Length Value', 'cm', adsk.core.ValueInput.createByReal(0))
+        length = inputs.addValueInput('lengthValue', 'Length Value', 'cm', adsk.core.ValueInput.createByReal(refLength))
         # Create the value input to get the height
-        height = inputs.addValueInput('heightValue', 'Height Value', 'cm', adsk.core.ValueInput.createByReal(0))
+        height = inputs.addValueInput('heightValue', 'Height Value', 'cm', adsk.core.ValueInput.createByReal(refHeight))
+        # Limit the values to the dimensions the pedestal can be built with
+        for name, valueInput in zip(plan.DIMENSIONS, (depth, length, height)):
+            valueInput.minimumValue, valueInput.maximumValue = clearance.DIMENSION_LIMITS[name]
+            valueInput.isMinimumValueInclusive = True
+            valueInput.isMaximumValueInclusive = True
+        # Create the check box to update the pedestal of the design instead of building a new one
+        update = inputs.addBoolValueInput('updateValue', 'Update Existing Pedestal', True, '', False)
+        # Show why the dimensions can't be built
+        problems = inputs.addTextBoxCommandInput('problemsText', 'Problems', '', 4, True)
+        problems.isVisible = False
 
         # Connect to the events that are needed by this command.
-        futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+        futil.add_handler(args.command.execute, command_execute, command=args.command)
+        futil.add_handler(args.command.inputChanged, command_input_changed, command=args.command)
+        futil.add_handler(args.command.validateInputs, command_validate_input, command=args.command)
+        futil.add_handler(args.command.executePreview, command_preview, command=args.command)
+        futil.add_handler(args.command.destroy, command_destroy, command=args.command)
+        _preview['command'] = args.command
+        _preview['due'] = True
     except:
         if ui:
             ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
@@ -114,61 +167,103 @@ def command_execute(args: adsk.core.CommandEventArgs):
         depth = inputs.itemById('depthValue').value
         length = inputs.itemById('lengthValue').value
         height = inputs.itemById('heightValue').value
+        update = inputs.itemById('updateValue').value
 
-        # Store the parameter values of the DCBase to constants
-        config.BASE_DEPTH = float(depth)
-        config.BASE_LENGTH = float(length)
-        config.BASE_HEIGHT = float(height)
+        # Check the planned parts before anything is created in the design
+        problems = clearance.check_pedestal(depth, length, height)
+        if problems:
+            ui.messageBox('The pedestal can\'t be built with these dimensions:\n' + '\n'.join(problems))
+            return
 
-        generateBase(depth, length, height)
-        config.IS_DCBASE_GENERATE = True
+        # The parameters are stored in the design by generateBase and regenerateBase
+        build = findBuild(des) if update else None
+        if build:
+            regenerateBase(build, depth, length, height)
+        else:
+            generateBase(depth, length, height)
 
     except:
         if ui:
             ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
-def profile_with_most_loops(sketch: adsk.fusion.Sketch, component: adsk.fusion.Component):
-    "get the profile with the most inner loops"
-    
-    if sketch.profiles.count == 0:
+def _dimensions(inputs):
+    return tuple(inputs.itemById(name + 'Value').value for name in plan.DIMENSIONS)
+
+def command_input_changed(args: adsk.core.InputChangedEventArgs):
+    # Wait until the dimensions are left unchanged before drawing the preview
+    _preview['generation'] += 1
+    _preview['due'] = False
+    if _preview['timer']:
+        _preview['timer'].cancel()
+    timer = threading.Timer(PREVIEW_DELAY, app.fireCustomEvent, (PREVIEW_EVENT_ID, str(_preview['generation'])))
+    timer.daemon = True
+    timer.start()
+    _preview['timer'] = timer
+
+def preview_due(args: adsk.core.CustomEventArgs):
+    # A timer which fired before it was cancelled belongs to an earlier change
+    if args.additionalInfo != str(_preview['generation']):
+        return
+    _preview['due'] = True
+    command = _preview['command']
+    if command and command.isValid:
+        command.doExecutePreview()
+
+def command_validate_input(args: adsk.core.ValidateInputsEventArgs):
+    inputs = args.inputs
+    problems = clearance.check_pedestal(*_dimensions(inputs))
+    text = inputs.itemById('problemsText')
+    text.text = '\n'.join(problems)
+    text.isVisible = bool(problems)
+    args.areInputsValid = not problems
+
+def command_preview(args: adsk.core.CommandEventArgs):
+    # Fusion 360 asks for a preview after every change, the timer asks again once the input settles
+    if not _preview['due']:
         return
-    else:
-        # start with the first profile
-        the_profile = sketch.profiles.item(0)
-        the_profile_loop_count = the_profile.profileLoops.count
-        # find the profile with the most loops
-        if sketch.profiles.count > 1:
-            for i in range(1, sketch.profiles.count):
-                next_profile = sketch.profiles.item(i)
-                next_profile_loop_count = next_profile.profileLoops.count
-                if next_profile_loop_count > the_profile_loop_count:
-                    the_profile = next_profile
-                    the_profile_loop_count = next_profile_loop_count
-
-        return the_profile
+
+    # Only the boxes of the current dimensions are shown
+    delete_preview_graphics()
+    dimensions = _dimensions(args.command.commandInputs)
+    if clearance.check_pedestal(*dimensions):
+        return
+
+    # Draw the bounding boxes of the planned parts instead of importing them
+    design = adsk.fusion.Design.cast(app.activeProduct)
+    pedestalPlan = plan.cached_plan(*dimensions)
+    group = design.rootComponent.customGraphicsGroups.add()
+    _preview['graphics'] = group
+    group.color = adsk.fusion.CustomGraphicsSolidColorEffect.create(adsk.core.Color.create(*PREVIEW_COLOR, 255))
+    brepManager = adsk.fusion.TemporaryBRepManager.get()
+    for box in clearance.boxes(pedestalPlan):
+        center = adsk.core.Point3D.create(*((lo + hi) / 2 for lo, hi in zip(box.low, box.high)))
+        size = [hi - lo for lo, hi in zip(box.low, box.high)]
+        orientedBox = adsk.core.OrientedBoundingBox3D.create(center, adsk.core.Vector3D.create(1, 0, 0),
+                                                             adsk.core.Vector3D.create(0, 1, 0), *size)
+        group.addBRepBody(brepManager.createBox(orientedBox))
+
+def delete_preview_graphics():
+    group = _preview['graphics']
+    if group and group.isValid:
+        group.deleteMe()
+    _preview['graphics'] = None
+
+def command_destroy(args: adsk.core.CommandEventArgs):
+    if _preview['timer']:
+        _preview['timer'].cancel()
+    _preview['timer'] = None
+    _preview['command'] = None
+    delete_preview_graphics()
 
 # Creat a extrusion by length with the default LCF8-8080 profile
+@futil.timed_function()
 def createExtrusion(importManager, distance, comp, consPlane):
     # get .dxf file directory
-    fileName = os.path.join(os.path.abspath(os.path.dirname(__file__)), './importFiles/LCF8-8080.dxf')
-
-    # Get dxf import options
-    dxfOptions = importManager.createDXF2DImportOptions(fileName, consPlane)
-    dxfOptions.isViewFit = True
-    dxfOptions.isSingleSketchResult = True
-
-    # Import dxf file to rootComponent
-    importManager.importToTarget(dxfOptions, comp)
+    fileName = os.path.join(IMPORT_FOLDER, plan.PROFILE_FILE)
 
-    # Get reference to the sketches
-    sketches = comp.sketches
-
-    # Get the sketch from sketches
-    sketch = sketches.item(0)
-
-    # Get profile from sketch for extrusion
-    profile_ext = profile_with_most_loops(sketch, comp)
-    # profile_ext = outer_loops(sketch)
+    # Import the dxf file once per design, the next extrusions copy its sketch
+    with futil.timed('extrusion profile'):
+        profile_ext = profileCache.profile(importManager, fileName, comp, consPlane)
 
     # create an extrusion input
     extrudes = comp.features.extrudeFeatures # create a extrusion in component1
@@ -184,43 +279,9 @@ def createExtrusion(importManager, distance, comp, consPlane):
     # Create the extrusion
     return extrudes.add(ext_input)
 
-def rotBySelf(occurrence, angle, axis):
-    "Rotate by self coordinate system"
-    origin = adsk.core.Point3D.create() # to store the origine point of the occurrence's coordinate system
-    xAxis = adsk.core.Vector3D.create() # to store the xAxis of the occurrence's coordinate system
-    yAxis = adsk.core.Vector3D.create() # to store the yAxis of the occurrence's coordiante system
-    zAxis = adsk.core.Vector3D.create() # to store the zAxis of the occurrence's coordiante system 
-    (origin, xAxis, yAxis, zAxis) = occurrence.transform.getAsCoordinateSystem() # get the occurrence's coordinate system
-    
-    if axis == 'x':
-        rotAxis = xAxis
-    elif axis == 'y':
-        rotAxis = yAxis
-    elif axis == 'z':
-        rotAxis = zAxis
-    
-    rot = adsk.core.Matrix3D.create()
-    rot.setToRotation(angle, rotAxis, origin)
-    trans = occurrence.transform
-    trans.transformBy(rot)
-    occurrence.transform = trans
-
-def translation(occurrence, distance, axis):
-    "Translation by the world coordination"
-    trans = adsk.core.Matrix3D.create()
-
-    if axis == 'x':
-        trans.translation = adsk.core.Vector3D.create(distance, 0, 0)
-    elif axis == 'y':
-        trans.translation = adsk.core.Vector3D.create(0.0, distance, 0.0)
-    elif axis == 'z':
-        trans.translation = adsk.core.Vector3D.create(0.0, 0.0, distance)
-    
-    transform = occurrence.transform
-    transform.transformBy(trans)
-    occurrence.transform = transform
-
-def generateBase(depth, length, height):
+@futil.timed_function()
+def generateBase(depth, length, height, targetComp=None):
+    "Build a pedestal in the target component, a new component of the root component by default"
     # TODO: try to using joint to assembly all the comments
 
     ui = None
@@ -228,13 +289,8 @@ def generateBase(depth, length, height):
         app = adsk.core.Application.get() # the root from the Fusion 360 API Object Model
         ui  = app.userInterface
 
-        # transfer into valueInput
-        l = float(length)
-        h = float(height)
-        d = float(depth)
-        length = adsk.core.ValueInput.createByReal(float(length))
-        height = adsk.core.ValueInput.createByReal(float(height))
-        depth = adsk.core.ValueInput.createByReal(float(depth))
+        # Plan the whole assembly first, the Fusion 360 API is only used to replay the plan
+        pedestalPlan = plan.plan_pedestal(depth, length, height)
 
         # Get import manager
         importManager = app.importManager
@@ -244,223 +300,224 @@ def generateBase(depth, length, height):
         # Get reference to the root component
         rootComp = design.rootComponent
 
-        # Create a new occurrence to create an associated component to create the first depth extrusion
-        trans1 = adsk.core.Matrix3D.create()
-        occDep1 = rootComp.occurrences.addNewComponent(trans1)
-        depth_comp = occDep1.component
-        depth_comp.name = "LCF8-8080-depth: " + str(d) + " cm"
-        ext_depth = createExtrusion(importManager, depth, depth_comp, depth_comp.xZConstructionPlane) # create an extrusion in depth direction
-
-        # Add the second depth extrusion occurrence from the depth component
-        trans2 = adsk.core.Matrix3D.create()
-        trans2.translation = adsk.core.Vector3D.create(l+8, 0.0, 0.0)
-        occDep2 = rootComp.occurrences.addExistingComponent(depth_comp, trans2)
-
-        # Create occurrence for length extrusion which comes from the length component
-        trans3 = adsk.core.Matrix3D.create()
-        trans3.translation = adsk.core.Vector3D.create(4.0, d/2-6, 0.0)
-        occLen1 = rootComp.occurrences.addNewComponent(trans3)
-        length_comp = occLen1.component
-        length_comp.name = "LCF8-8080-length: " + str(l) + " cm"
-        ext_length = createExtrusion(importManager, length, length_comp, length_comp.yZConstructionPlane)
-
-        # Add the second depth extrusion occurrence from the length component
-        trans4 = adsk.core.Matrix3D.create()
-        trans4.translation = adsk.core.Vector3D.create(0.0, 12.0, 0.0)
-        occLen2 = rootComp.occurrences.addExistingComponent(length_comp, trans4)
-
-        # Create occurrence for height extrusion
-        trans5 = adsk.core.Matrix3D.create()
-        trans5.translation = adsk.core.Vector3D.create(l/2 - 2.0, d/2 - 6.0, 4.0)
-        occHei1 = rootComp.occurrences.addNewComponent(trans5)
-        height_comp = occHei1.component
-        height_comp.name = "LCF8-8080-height: " + str(h) + " cm"
-        ext_height = createExtrusion(importManager, height, height_comp, height_comp.xYConstructionPlane)
-
-        # Add the second height extrusion occurrence from the height component
-        trans6 = adsk.core.Matrix3D.create()
-        trans6.translation = adsk.core.Vector3D.create(12.0, 0, 0)
-        occHei2 = rootComp.occurrences.addExistingComponent(height_comp, trans6)
-
-        # Add the third height extrusion occurrence from the height component
-        trans7 = adsk.core.Matrix3D.create()
-        trans7.translation = adsk.core.Vector3D.create(12.0, 12.0, 0)
-        occHei3 = rootComp.occurrences.addExistingComponent(height_comp, trans7)
-
-        # Add the fourth height extrusion occurrence from the height component
-        trans8 = adsk.core.Matrix3D.create()
-        trans8.translation = adsk.core.Vector3D.create(0.0, 12.0, 0)
-        occHei4 = rootComp.occurrences.addExistingComponent(height_comp, trans8)
-
-        ## setup all the caps
-        # import cap step file
-        capFileName = os.path.join(os.path.abspath(os.path.dirname(__file__)), "./importFiles/ASSF-CAP-LCEC8_8080_B.step")
-        capStepImpOpt = importManager.createSTEPImportOptions(capFileName)
-        importManager.importToTarget(capStepImpOpt, rootComp)
-        
-        occCap1 = rootComp.occurrences.item(8) # refers to the Cap occurrances
-        capComp = occCap1.component # get the associated component of the cap
-
-        # set up the first cap
-        rotBySelf(occCap1, -math.pi/2, 'x')
-        translation(occCap1, -0.4, 'y')
-
-        # set up the second cap
-        transCap2 = adsk.core.Matrix3D.create()
-        transCap2.translation = adsk.core.Vector3D.create(l+8, 0.0, 0.0)
-        occCap2 = rootComp.occurrences.addExistingComponent(capComp, transCap2) # create a new occurrence for the cap component
-
-        # set up the third cap
-        transCap3 = adsk.core.Matrix3D.create()
-        transCap3.translation = adsk.core.Vector3D.create(0.0, d+0.8, 0.0)
-        occCap3 = rootComp.occurrences.addExistingComponent(capComp, transCap3)
-        rotBySelf(occCap3, math.pi, 'y')
-
-        # set up the fourth cap
-        transCap4 = adsk.core.Matrix3D.create()
-        transCap4.translation = adsk.core.Vector3D.create(l+8, d+0.8, 0.0)
-        occCap4 = rootComp.occurrences.addExistingComponent(capComp, transCap4)
-        rotBySelf(occCap4, math.pi, 'y')
-
-        ## set up all the wheel connectors(140*80*20 mm)
-        # import wheel connector STEP file
-        wheelConFileName = os.path.join(os.path.abspath(os.path.dirname(__file__)), "./importFiles/ASSF-CONN-E8080.step")
-        wheelConStepImpOpt = importManager.createSTEPImportOptions(wheelConFileName)
-        importManager.importToTarget(wheelConStepImpOpt, rootComp)
-
-        occWheelCon1 = rootComp.occurrences.item(12)
-        wheelConComp = occWheelCon1.component
-
-        # set up the first wheel connnceter
-        translation(occWheelCon1, -4.0, 'z')
-        translation(occWheelCon1, 7.0, 'y')
-        rotBySelf(occWheelCon1, -math.pi/2, 'x')
-        rotBySelf(occWheelCon1, math.pi/2, 'y')
-
-        # set up the second wheel connector
-        transWheelCon2 = adsk.core.Matrix3D.create()
-        transWheelCon2.translation = adsk.core.Vector3D.create(l+8, 0.0, 0.0)
-        occWheelCon2 = rootComp.occurrences.addExistingComponent(wheelConComp, transWheelCon2)
-
-        # set up the third wheel connector
-        transWheelCon3 = adsk.core.Matrix3D.create()
-        transWheelCon3.translation = adsk.core.Vector3D.create(l+8, d-14, 0.0)
-        occWheelCon3 = rootComp.occurrences.addExistingComponent(wheelConComp, transWheelCon3)
-
-        # set up the fourth conncetor
-        transWheelCon4 = adsk.core.Matrix3D.create()
-        transWheelCon4.translation = adsk.core.Vector3D.create(0.0, d-14, 0.0)
-        occWheelCon4 = rootComp.occurrences.addExistingComponent(wheelConComp, transWheelCon4)
-
-        ## Set up all the wheels
-        # import wheel step file
-        wheelFileName = os.path.join(os.path.abspath(os.path.dirname(__file__)), "./importFiles/GD-60-F.step")
-        wheelStepImpOpt = importManager.createSTEPImportOptions(wheelFileName)
-        importManager.importToTarget(wheelStepImpOpt, rootComp)        
-
-        occWheel1 = rootComp.occurrences.item(16)
-        wheelComp = occWheel1.component
-
-        # set up the first wheel  
-        translation(occWheel1, -7.33, 'z')
-        translation(occWheel1, 7.0, 'y')
-        rotBySelf(occWheel1, -math.pi/2, 'z')
-
-        # set up the second wheel
-        transWheel2 = adsk.core.Matrix3D.create()
-        transWheel2.translation = adsk.core.Vector3D.create(l+8, 0.0, 0.0)
-        occWheel2 = rootComp.occurrences.addExistingComponent(wheelComp, transWheel2)
-
-        # set up the third wheel
-        transWheel3 = adsk.core.Matrix3D.create()
-        transWheel3.translation = adsk.core.Vector3D.create(l+8, d-14, 0.0)
-        occWheel3 = rootComp.occurrences.addExistingComponent(wheelComp, transWheel3)     
-
-        # set up the fourth wheel
-        transWheel4 = adsk.core.Matrix3D.create()
-        transWheel4.translation = adsk.core.Vector3D.create(0.0, d-14, 0.0)
-        occWheel4 = rootComp.occurrences.addExistingComponent(wheelComp, transWheel4)
-
-        ## set up all the extrusions connectors
-        # import the extrusion connector step file
-        extConFileName = os.path.join(os.path.abspath(os.path.dirname(__file__)), "./importFiles/LBSB8-8080.step")
-        extConStepImpOpt = importManager.createSTEPImportOptions(extConFileName)
-        importManager.importToTarget(extConStepImpOpt, rootComp)
-
-        occExtCon1 = rootComp.occurrences.item(20)
-        extConComp = occExtCon1.component
-
-        # # set up the first extrusion conncetor
-        rotBySelf(occExtCon1, math.pi/2, 'x')
-        translation(occExtCon1, 4.0, 'x')
-        translation(occExtCon1, d/2 - 10, 'y')
-
-        # set up the second extrusion connector
-        transExtCon2 = adsk.core.Matrix3D.create()
-        transExtCon2.translation = adsk.core.Vector3D.create(l, 0.0, 0.0)
-        occExtCon2 = rootComp.occurrences.addExistingComponent(extConComp, transExtCon2)
-        rotBySelf(occExtCon2, -math.pi/2, 'y')
-
-        # set up the third extrusion connector
-        transExtCon3 = adsk.core.Matrix3D.create()
-        transExtCon3.translation = adsk.core.Vector3D.create(l, 20, 0.0)
-        occExtCon3 = rootComp.occurrences.addExistingComponent(extConComp, transExtCon3)
-        rotBySelf(occExtCon3, -math.pi, 'y')    
-
-        # set up the fourth extrusion connector
-        transExtCon4 = adsk.core.Matrix3D.create()
-        transExtCon4.translation = adsk.core.Vector3D.create(0.0, 20, 0.0)
-        occExtCon4 = rootComp.occurrences.addExistingComponent(extConComp, transExtCon4)   
-        rotBySelf(occExtCon4, math.pi/2, 'y')      
-
-        # set up the fifth extrusion connector
-        transExtCon5 = adsk.core.Matrix3D.create()
-        transExtCon5.translation = adsk.core.Vector3D.create(l/2 - 10, 4, 4)
-        occExtCon5 = rootComp.occurrences.addExistingComponent(extConComp, transExtCon5)
-        rotBySelf(occExtCon5, -math.pi/2, 'x')
-        rotBySelf(occExtCon5, math.pi, 'z')
-
-        # set up the sixth extrusion connector
-        transExtCon6 = adsk.core.Matrix3D.create()
-        transExtCon6.translation = adsk.core.Vector3D.create(l/2 + 10, 4, 4)
-        occExtCon6 = rootComp.occurrences.addExistingComponent(extConComp, transExtCon6)
-        rotBySelf(occExtCon6, -math.pi/2, 'x')   
-
-        # set up seventh extrusion connector
-        transExtCon7 = adsk.core.Matrix3D.create()
-        transExtCon7.translation = adsk.core.Vector3D.create(l/2 - 10, 16, 4)
-        occExtCon7 = rootComp.occurrences.addExistingComponent(extConComp, transExtCon7)
-        rotBySelf(occExtCon7, -math.pi/2, 'x')
-        rotBySelf(occExtCon7, math.pi, 'z')  
-
-        # set up the eighth extrusion connector
-        transExtCon8 = adsk.core.Matrix3D.create()
-        transExtCon8.translation = adsk.core.Vector3D.create(l/2 + 10, 16, 4)
-        occExtCon8 = rootComp.occurrences.addExistingComponent(extConComp, transExtCon8) 
-        rotBySelf(occExtCon8, -math.pi/2, 'x')   
-
-
-        ## set up the flange
-        flangeFileName = os.path.join(os.path.abspath(os.path.dirname(__file__)), "./importFiles/ASSF-RFP-UR5_AUBOi5_FrankEmika-200_200_20.step")
-        flangeStepImpOpt = importManager.createSTEPImportOptions(flangeFileName)
-        importManager.importToTarget(flangeStepImpOpt, rootComp)
-
-        occFlange = rootComp.occurrences.item(28)
-        flangeComp = occFlange.component
-
-        rotBySelf(occFlange, math.pi/2, 'x')
-        translation(occFlange, l/2 + 4, 'x')
-        translation(occFlange, d/2, 'y')
-        translation(occFlange, h+4, 'z')
+        # Every pedestal lives in its own component, which holds its parameters
+        if targetComp is None:
+            targetComp = rootComp.occurrences.addNewComponent(adsk.core.Matrix3D.create()).component
+            targetComp.name = 'DeepClaw Pedestal'
+
+        # The design is computed once all the parts are placed
+        with batchedCompute(design):
+            build = replayPlan(pedestalPlan, importManager, targetComp)
+        pedestalBuilds.append(build)
+        pedestalState.save(targetComp, build.id, pedestalPlan.depth, pedestalPlan.length, pedestalPlan.height)
+
+        report = componentCache.report()
+        futil.log(f"{CMD_NAME} STEP cache: {report['hits']} hits, {report['misses']} misses, "
+                  f"{report['import_time']:.2f}s importing, {report['reuse_time']:.2f}s reusing")
+        report = profileCache.report()
+        futil.log(f"{CMD_NAME} DXF profile: {report['imports']} imports, {report['copies']} copies")
 
         # # Create the AsBuiltJoint
         # asBuiltJoints = rootComp.asBuiltJoints
         # asBuiltJointInput = asBuiltJoints.createInput(occDep1, occLen1, None)
         # asBuiltJoints.add(asBuiltJointInput)
 
-        # return True
+        return build
 
     except:
         if ui:
             ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
+@futil.timed_function()
+def generateFrame(nodes, edges, targetComp=None):
+    """Build a frame of extrusions described as a graph, see frame.plan_frame.
+
+    The frame is built in the target component, a new component of the root
+    component by default. It shares the DXF profile and the STEP brackets
+    already imported in the design with the pedestals.
+    """
+    framePlan = frame.plan_frame(nodes, edges)
+
+    design = app.activeProduct
+    if targetComp is None:
+        targetComp = design.rootComponent.occurrences.addNewComponent(adsk.core.Matrix3D.create()).component
+        targetComp.name = 'DeepClaw Frame'
+
+    # The design is computed once all the parts are placed
+    with batchedCompute(design):
+        build = replayPlan(framePlan, app.importManager, targetComp)
+
+    futil.log(f'{CMD_NAME} frame: {len(framePlan.beams)} beams of {len(build.extrusions)} lengths, '
+              f'{len(framePlan.occurrences) - len(framePlan.beams)} brackets')
+    return build
+
+@futil.timed_function()
+def regenerateBase(build, depth, length, height):
+    "Update a built pedestal, only the parts depending on the changed dimensions are edited"
+    ui = None
+    try:
+        app = adsk.core.Application.get()
+        ui  = app.userInterface
+
+        oldPlan = build.plan
+        newPlan = plan.plan_pedestal(depth, length, height)
+
+        # Collect the components and occurrences depending on the changed dimensions
+        dependencies = plan.dependencies(oldPlan)
+        componentKeys = set()
+        roles = set()
+        for dim in plan.DIMENSIONS:
+            if getattr(oldPlan, dim) != getattr(newPlan, dim):
+                componentKeys |= dependencies[dim].components
+                roles |= dependencies[dim].occurrences
+
+        # The design is computed once all the parts are edited
+        with batchedCompute(build.targetComp.parentDesign):
+            _updateBuild(build, newPlan, componentKeys, roles)
+
+        build.plan = newPlan
+        saved = pedestalState.index.get(build.targetComp.parentDesign, build.id)
+        pedestalState.save(build.targetComp, build.id, newPlan.depth, newPlan.length, newPlan.height,
+                           saved.created if saved else None)
+        futil.log(f'{CMD_NAME} updated {len(componentKeys)} extrusions and {len(roles)} occurrences')
+        return build
+
+    except:
+        if ui:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+def _updateBuild(build, newPlan, componentKeys, roles):
+    "Edit the components and occurrences of the build to match the new plan"
+    # Change the extrusion distances
+    for key in componentKeys:
+        compSpec = newPlan.component(key)
+        build.components[key].name = compSpec.name
+        extrusion = build.extrusions.get(key)
+        if extrusion:
+            extent = adsk.fusion.DistanceExtentDefinition.cast(extrusion.extentOne)
+            extent.distance.value = compSpec.distance
+
+    # Move the occurrences
+    for role in roles:
+        build.occurrences[role].transform = toMatrix3D(newPlan.occurrence(role).transform)
+
+@contextlib.contextmanager
+def batchedCompute(design):
+    """Suspend the compute of the design while the block edits it, then compute it once.
+
+    The design is first turned into a direct design when config.BUILD_DESIGN_TYPE
+    is 'direct'. Nested blocks leave the compute to the outermost one.
+    """
+    if config.BUILD_DESIGN_TYPE == 'direct' and design.designType != adsk.fusion.DesignTypes.DirectDesignType:
+        futil.log(f'{CMD_NAME} turns the design into a direct design, its timeline is removed')
+        design.designType = adsk.fusion.DesignTypes.DirectDesignType
+
+    # A direct design has no history to recompute
+    deferring = design.designType == adsk.fusion.DesignTypes.ParametricDesignType and not design.isComputeDeferred
+    if deferring:
+        design.isComputeDeferred = True
+    try:
+        yield
+    finally:
+        if deferring:
+            design.isComputeDeferred = False
+            with futil.timed('computeAll'):
+                design.computeAll()
+
+def findBuild(design):
+    "The last pedestal built in the design which still exists, or None"
+    # The extrusions of a direct design can't be edited, its pedestals are rebuilt
+    if design.designType == adsk.fusion.DesignTypes.DirectDesignType:
+        return None
+
+    for build in reversed(pedestalBuilds):
+        if build.isValid() and build.targetComp.parentDesign == design:
+            return build
+
+    # The pedestal may have been built in another session
+    pedestal = pedestalState.index.latest(design)
+    if pedestal:
+        return restoreBuild(pedestal)
+    return None
+
+def restoreBuild(pedestal):
+    "Recreate the PedestalBuild of a pedestal from its stored parameters and tagged occurrences"
+    if not occurrenceRegistry.occurrences(pedestal.id):
+        occurrenceRegistry.load(pedestal.component.parentDesign)
+
+    build = PedestalBuild(plan.plan_pedestal(pedestal.depth, pedestal.length, pedestal.height),
+                          pedestal.component, pedestal.id)
+    for occSpec in build.plan.occurrences:
+        occ = occurrenceRegistry.get(build.id, occSpec.role)
+        if occ is None:
+            return None
+        build.components.setdefault(occSpec.component, occ.component)
+
+    for compSpec in build.plan.components:
+        if compSpec.is_extrusion:
+            extrudes = build.components[compSpec.key].features.extrudeFeatures
+            if extrudes.count == 0:
+                return None
+            build.extrusions[compSpec.key] = extrudes.item(0)
+
+    pedestalBuilds.append(build)
+    return build
+
+class PedestalBuild:
+    "The Fusion 360 objects created by replaying a pedestal plan"
+    def __init__(self, pedestalPlan, targetComp, pedestalId=None):
+        self.id = pedestalId or new_pedestal_id()
+        self.plan = pedestalPlan
+        self.targetComp = targetComp
+        self.components = {} # component key -> component
+        self.extrusions = {} # component key -> extrude feature
+
+    @property
+    def occurrences(self):
+        "Dict from role to occurrence, kept by the registry"
+        return occurrenceRegistry.occurrences(self.id)
+
+    def isValid(self):
+        if not self.targetComp.isValid:
+            return False
+        return all(occ.isValid for occ in self.occurrences.values()) and \
+            all(ext.isValid for ext in self.extrusions.values())
+
+def toMatrix3D(matrix):
+    "Convert a planned transform into an adsk.core.Matrix3D"
+    trans = adsk.core.Matrix3D.create()
+    trans.setWithArray(list(matrix))
+    return trans
+
+@futil.timed_function()
+def replayPlan(pedestalPlan, importManager, targetComp):
+    "Create all the planned components and occurrences in the target component"
+    occurrences = targetComp.occurrences
+    build = PedestalBuild(pedestalPlan, targetComp)
+    components = build.components
+
+    for occSpec in pedestalPlan.occurrences:
+        compSpec = pedestalPlan.component(occSpec.component)
+        # The placement is composed in the plan, so every occurrence gets its transform written once
+        transform = toMatrix3D(occSpec.transform)
+
+        if compSpec.key in components:
+            # Add another occurrence of an already created component
+            occ = occurrences.addExistingComponent(components[compSpec.key], transform)
+        elif compSpec.is_extrusion:
+            # Create a new component holding the extrusion
+            occ = occurrences.addNewComponent(transform)
+            comp = occ.component
+            comp.name = compSpec.name
+            distance = adsk.core.ValueInput.createByReal(compSpec.distance)
+            plane = getattr(comp, compSpec.plane + 'ConstructionPlane')
+            build.extrusions[compSpec.key] = createExtrusion(importManager, distance, comp, plane)
+        else:
+            # Import the STEP file, or reuse the component if it was already imported in this design
+            fileName = os.path.join(IMPORT_FOLDER, compSpec.source)
+            occ = componentCache.add_occurrence(importManager, fileName, targetComp, transform)
+
+        components.setdefault(compSpec.key, occ.component)
+        occurrenceRegistry.register(build.id, occSpec.role, occ)
+
+    return build
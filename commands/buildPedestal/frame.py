@@ -0,0 +1,192 @@
+# Headless planning of extrusion frames described as a graph.
+#
+# The nodes of the graph are the joints of the frame and its edges are the
+# LCF8-8080 extrusions between them. plan_frame solves the whole graph at
+# once: the cut length of every beam, the brackets at every joint and the
+# transform of every part. Beams of the same cut length share a component,
+# so the assembly only creates one extrusion per distinct length and adds
+# the other beams as occurrences of it. Like plan.py, this module does not
+# import adsk; the result is replayed by replayPlan in entry.py.
+
+import json
+import math
+from typing import Dict, NamedTuple, Tuple
+
+from .plan import BomLine, ComponentSpec, OccurrenceSpec, PROFILE_FILE
+from .transforms import AXES, TransformComposer, identity
+
+# Width of the LCF8-8080 profile (cm)
+PROFILE_SIZE = 8.0
+
+# The bracket joining two beams at a corner
+BRACKET_FILE = 'LBSB8-8080.step'
+BRACKET_PART = 'LBSB8-8080'
+
+# At a joint the beam along the first axis of this order runs through, the
+# other beams are cut to butt against its side
+AXIS_PRIORITY = ('z', 'x', 'y')
+
+# Rotation turning the extrusion direction of the xY sketch (+z) to each axis
+_BEAM_ROTATIONS = {
+    'x': (('rot', math.pi/2, 'y'),),
+    'y': (('rot', -math.pi/2, 'x'),),
+    'z': (),
+}
+
+# Digits the cut lengths are rounded to before they are compared (cm)
+LENGTH_DIGITS = 2
+
+
+class Beam(NamedTuple):
+    role: str
+    start: str      # node at the low end
+    end: str        # node at the high end
+    axis: str       # 'x', 'y' or 'z'
+    length: float   # cut length (cm)
+    offset: float   # position of the low end of the beam along its axis (cm)
+
+
+class FramePlan(NamedTuple):
+    nodes: Dict[str, Tuple[float, float, float]]
+    beams: Tuple[Beam, ...]
+    components: Tuple[ComponentSpec, ...]
+    occurrences: Tuple[OccurrenceSpec, ...]
+    bom: Tuple[BomLine, ...]
+
+    def component(self, key):
+        for comp in self.components:
+            if comp.key == key:
+                return comp
+        raise KeyError(key)
+
+    def occurrence(self, role):
+        for occ in self.occurrences:
+            if occ.role == role:
+                return occ
+        raise KeyError(role)
+
+
+def _axis(a, b):
+    "The axis the segment a-b is parallel to"
+    diffs = [abs(q - p) for p, q in zip(a, b)]
+    moving = [i for i, diff in enumerate(diffs) if diff > 1e-9]
+    if len(moving) != 1:
+        return None
+    return 'xyz'[moving[0]]
+
+
+def _cross(a, b):
+    return (a[1]*b[2] - a[2]*b[1],
+            a[2]*b[0] - a[0]*b[2],
+            a[0]*b[1] - a[1]*b[0])
+
+
+def _matrix(origin, xAxis, yAxis):
+    "Transform whose own x and y axes are the given world directions"
+    zAxis = _cross(xAxis, yAxis)
+    return (xAxis[0], yAxis[0], zAxis[0], float(origin[0]),
+            xAxis[1], yAxis[1], zAxis[1], float(origin[1]),
+            xAxis[2], yAxis[2], zAxis[2], float(origin[2]),
+            0.0, 0.0, 0.0, 1.0)
+
+
+def plan_frame(nodes, edges, profileSize=PROFILE_SIZE):
+    """Plan a frame of axis-aligned extrusions, all the dimensions are in cm.
+
+    nodes is a dict from the node name to its (x, y, z) position, the center
+    of the joint. edges is a sequence of (node, node) pairs, one per beam.
+    Raises ValueError if an edge isn't parallel to an axis or if a beam is
+    too short to be cut.
+    """
+    nodes = {name: tuple(float(value) for value in position) for name, position in nodes.items()}
+    half = profileSize / 2
+
+    # Orient every edge from its low end to its high end
+    segments = []
+    for index, (a, b) in enumerate(edges):
+        if a not in nodes or b not in nodes:
+            raise ValueError(f'Unknown node in edge {a}-{b}')
+        axis = _axis(nodes[a], nodes[b])
+        if axis is None:
+            raise ValueError(f'Edge {a}-{b} is not parallel to an axis')
+        if nodes[a][AXES[axis]] > nodes[b][AXES[axis]]:
+            a, b = b, a
+        segments.append((index, a, b, axis))
+
+    # The beam running through each joint: the first axis of AXIS_PRIORITY, then the first edge
+    joints = {} # node -> [(segment index, axis, direction of the beam from the node)]
+    for index, a, b, axis in segments:
+        joints.setdefault(a, []).append((index, axis, 1.0))
+        joints.setdefault(b, []).append((index, axis, -1.0))
+    through = {
+        node: min(ends, key=lambda end: (AXIS_PRIORITY.index(end[1]), end[0]))[0]
+        for node, ends in joints.items()
+    }
+
+    # Cut lengths: a beam reaches the outer face of the joints it runs through
+    # and stops at the side of the beam running through the other joints
+    beams = []
+    for index, a, b, axis in segments:
+        low = half if through[a] == index else -half
+        high = half if through[b] == index else -half
+        i = AXES[axis]
+        length = round(nodes[b][i] - nodes[a][i] + low + high, LENGTH_DIGITS)
+        if length <= 0:
+            raise ValueError(f'Beam {a}-{b} is too short: {length} cm')
+        beams.append(Beam(f'beam{index + 1}', a, b, axis, length, nodes[a][i] - low))
+
+    # One extrusion component per distinct cut length
+    components = []
+    keys = {} # length -> component key
+    for length in sorted({beam.length for beam in beams}):
+        key = 'beam' + str(length)
+        keys[length] = key
+        components.append(ComponentSpec(key, "LCF8-8080-frame: " + str(length) + " cm",
+                                        "LCF8-8080-" + str(int(round(length * 10))), PROFILE_FILE, 'xY', length))
+
+    occurrences = []
+    for beam in beams:
+        ops = _BEAM_ROTATIONS[beam.axis]
+        position = list(nodes[beam.start])
+        position[AXES[beam.axis]] = beam.offset
+        matrix = TransformComposer().apply(ops).move(*position).matrix
+        occurrences.append(OccurrenceSpec(beam.role, keys[beam.length], identity(), ops, matrix))
+
+    # A bracket in the corner between every butting beam and the beam running
+    # through the joint. Its legs, along its own y and z axes, lie on the
+    # sides of the butting beam and of the main beam, and its width, along
+    # its own x axis, is centered on the joint.
+    brackets = 0
+    for node in sorted(joints):
+        ends = joints[node]
+        mainIndex, mainAxis, mainDirection = next(end for end in ends if end[0] == through[node])
+        mainVector = [0.0, 0.0, 0.0]
+        mainVector[AXES[mainAxis]] = mainDirection
+        for index, axis, direction in ends:
+            if index == mainIndex or axis == mainAxis:
+                continue
+            vector = [0.0, 0.0, 0.0]
+            vector[AXES[axis]] = direction
+            origin = [p + half * (v + m) for p, v, m in zip(nodes[node], vector, mainVector)]
+            brackets += 1
+            occurrences.append(OccurrenceSpec(f'bracket{brackets}', 'bracket', identity(), (),
+                                              _matrix(origin, _cross(vector, mainVector), vector)))
+    if brackets:
+        components.append(ComponentSpec('bracket', BRACKET_PART, BRACKET_PART, BRACKET_FILE))
+
+    bom = tuple(
+        BomLine(comp.part, sum(1 for occ in occurrences if occ.component == comp.key))
+        for comp in components
+    )
+    return FramePlan(nodes, tuple(beams), tuple(components), tuple(occurrences), bom)
+
+
+def load_frame(filename):
+    """Read a frame description from a JSON file.
+
+    The file holds {"nodes": {"name": [x, y, z], ...}, "edges": [["a", "b"], ...]}
+    with the positions in cm. Returns the nodes and edges for plan_frame.
+    """
+    with open(filename) as f:
+        values = json.load(f)
+    return values['nodes'], [tuple(edge) for edge in values['edges']]
@@ -0,0 +1,245 @@
+# Headless planning engine of the DeepClaw pedestal.
+#
+# This module turns a (depth, length, height) triple into an immutable
+# assembly plan: the components to create, every occurrence with its 4x4
+# transform and the BOM lines. It does not import adsk, so plans can be
+# generated, validated and diffed without a Fusion 360 process.
+# generateBase in entry.py only replays the plan.
+
+import functools
+import math
+from typing import FrozenSet, NamedTuple, Tuple
+
+from .transforms import TransformComposer, identity, translation_matrix
+
+# A transform is a flat tuple of 16 floats in row-major order, the same
+# layout as adsk.core.Matrix3D.asArray()
+Matrix = Tuple[float, ...]
+
+# The profile of all the aluminium extrusions
+PROFILE_FILE = 'LCF8-8080.dxf'
+
+# The parameters of a pedestal
+DIMENSIONS = ('depth', 'length', 'height')
+
+
+class ComponentSpec(NamedTuple):
+    key: str                # unique key of the component in the plan
+    name: str               # name of the component in Fusion 360
+    part: str               # part number used in the BOM
+    source: str             # file in importFiles the component comes from
+    plane: str = None       # construction plane of the extrusion sketch, None for STEP parts
+    distance: float = None  # extrusion distance in cm, None for STEP parts
+
+    @property
+    def is_extrusion(self):
+        return self.plane is not None
+
+
+class OccurrenceSpec(NamedTuple):
+    role: str           # e.g. 'cap1', 'wheel3', 'flange'
+    component: str      # key of the ComponentSpec
+    initial: Matrix     # transform the occurrence is created with
+    ops: Tuple          # ('rot', angle, axis) or ('move', distance, axis) applied to the initial transform
+    transform: Matrix   # the resulting transform of the occurrence
+
+
+class BomLine(NamedTuple):
+    part: str
+    quantity: int
+
+
+class PedestalPlan(NamedTuple):
+    depth: float
+    length: float
+    height: float
+    components: Tuple[ComponentSpec, ...]
+    occurrences: Tuple[OccurrenceSpec, ...]
+    bom: Tuple[BomLine, ...]
+
+    def component(self, key):
+        for comp in self.components:
+            if comp.key == key:
+                return comp
+        raise KeyError(key)
+
+    def occurrence(self, role):
+        for occ in self.occurrences:
+            if occ.role == role:
+                return occ
+        raise KeyError(role)
+
+
+class Dependencies(NamedTuple):
+    components: FrozenSet[str]  # keys of the components whose extrusion or name change
+    occurrences: FrozenSet[str] # roles of the occurrences whose transform change
+
+
+def _occurrence(role, component, initial=None, ops=()):
+    initial = initial or identity()
+    ops = tuple(ops)
+    return OccurrenceSpec(role, component, initial, ops, TransformComposer(initial).apply(ops).matrix)
+
+
+class Mirror(NamedTuple):
+    axis: str           # 'x' or 'y', the grid direction the instances are mirrored along
+    ops: Tuple          # local ops turning an instance to face the other side
+    side: str = 'high'  # the half of the cells the ops apply to, 'high' or 'low'
+
+
+class PartPattern(NamedTuple):
+    """A part repeated on a rectangular grid.
+
+    Every instance is rotated by ops around its own axes and moved to its
+    cell, then the mirror rules and the turn rule are applied. The roles are
+    numbered from start in the order of the cells, e.g. cap1, cap2, ...
+    """
+    prefix: str
+    component: str                          # key of the ComponentSpec
+    counts: Tuple[int, int] = (1, 1)        # cells along x and y
+    steps: Tuple[float, float] = (0.0, 0.0) # cm between two cells along x and y
+    origin: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    ops: Tuple = ()                         # local ops of every instance
+    mirrors: Tuple[Mirror, ...] = ()
+    turn: Tuple = None                      # (angle, axis), the n-th instance is turned n times this angle
+    order: str = 'rows'                     # 'rows', or 'ring' to go back along every other row
+    first: Tuple = None                     # ops placing the first instance, if it isn't placed like the others
+    start: int = 1                          # number of the first role
+
+
+def _cells(pattern):
+    nx, ny = pattern.counts
+    cells = []
+    for j in range(ny):
+        row = range(nx) if pattern.order == 'rows' or j % 2 == 0 else reversed(range(nx))
+        cells.extend((i, j) for i in row)
+    return cells
+
+
+def _mirrored(mirror, index, count):
+    if mirror.side == 'high':
+        return index >= (count + 1) // 2
+    return index < count // 2
+
+
+def place(pattern):
+    """Emit the OccurrenceSpec of every instance of the pattern.
+
+    The rotation of each distinct list of ops is composed once and shared
+    by the instances using it, only the offsets of the cells differ.
+    """
+    rotations = {} # ops -> composed transform
+    occurrences = []
+    ox, oy, oz = pattern.origin
+    sx, sy = pattern.steps
+    for n, (i, j) in enumerate(_cells(pattern)):
+        role = f'{pattern.prefix}{pattern.start + n}'
+        if n == 0 and pattern.first is not None:
+            occurrences.append(_occurrence(role, pattern.component, ops=pattern.first))
+            continue
+
+        ops = tuple(pattern.ops)
+        for mirror in pattern.mirrors:
+            index = i if mirror.axis == 'x' else j
+            if _mirrored(mirror, index, pattern.counts[0 if mirror.axis == 'x' else 1]):
+                ops += tuple(mirror.ops)
+        if pattern.turn and n:
+            angle, axis = pattern.turn
+            ops += (('rot', math.remainder(n * angle, 2 * math.pi), axis),)
+
+        if ops not in rotations:
+            rotations[ops] = TransformComposer().apply(ops).matrix
+        x, y, z = ox + i * sx, oy + j * sy, oz
+        m = list(rotations[ops])
+        m[3] += x
+        m[7] += y
+        m[11] += z
+        occurrences.append(OccurrenceSpec(role, pattern.component, translation_matrix(x, y, z), ops, tuple(m)))
+    return occurrences
+
+
+def plan_pedestal(depth, length, height):
+    "Plan the DeepClaw pedestal, all the dimensions are in cm"
+    d = float(depth)
+    l = float(length)
+    h = float(height)
+    pi = math.pi
+
+    components = (
+        ComponentSpec('depth', "LCF8-8080-depth: " + str(d) + " cm", "LCF8-8080-" + str(int(d*10)), PROFILE_FILE, 'xZ', d),
+        ComponentSpec('length', "LCF8-8080-length: " + str(l) + " cm", "LCF8-8080-" + str(int(l*10)), PROFILE_FILE, 'yZ', l),
+        ComponentSpec('height', "LCF8-8080-height: " + str(h) + " cm", "LCF8-8080-" + str(int(h*10)), PROFILE_FILE, 'xY', h),
+        ComponentSpec('cap', 'ASSF-CAP-LCEC8_8080_B', 'ASSF-CAP-LCE8_8080', 'ASSF-CAP-LCEC8_8080_B.step'),
+        ComponentSpec('wheelCon', 'ASSF-CONN-E8080', 'ASSF-CONN-E8080', 'ASSF-CONN-E8080.step'),
+        ComponentSpec('wheel', 'GD-60-F', 'GD-60-F', 'GD-60-F.step'),
+        ComponentSpec('extCon', 'LBSB8-8080', 'LBSB8-8080', 'LBSB8-8080.step'),
+        ComponentSpec('flange', 'ASSF-RFP-UR5_AUBOi5_FrankEmika-200_200_20', 'ASSF-RFP-UR5_AUBOi5_FrankEmika', 'ASSF-RFP-UR5_AUBOi5_FrankEmika-200_200_20.step'),
+    )
+
+    patterns = (
+        # the extrusions in depth, length and height direction
+        PartPattern('depth', 'depth', (2, 1), (l+8, 0.0)),
+        PartPattern('length', 'length', (1, 2), (0.0, 12.0),
+                    first=[('move', 4.0, 'x'), ('move', d/2-6, 'y')]),
+        PartPattern('height', 'height', (2, 2), (12.0, 12.0), order='ring',
+                    first=[('move', l/2 - 2.0, 'x'), ('move', d/2 - 6.0, 'y'), ('move', 4.0, 'z')]),
+
+        # caps, the far ones face the other way
+        PartPattern('cap', 'cap', (2, 2), (l+8, d+0.8), mirrors=[Mirror('y', [('rot', pi, 'y')])],
+                    first=[('rot', -pi/2, 'x'), ('move', -0.4, 'y')]),
+
+        # wheel connectors (140*80*20 mm)
+        PartPattern('wheelCon', 'wheelCon', (2, 2), (l+8, d-14), order='ring',
+                    first=[('move', -4.0, 'z'), ('move', 7.0, 'y'), ('rot', -pi/2, 'x'), ('rot', pi/2, 'y')]),
+
+        # wheels
+        PartPattern('wheel', 'wheel', (2, 2), (l+8, d-14), order='ring',
+                    first=[('move', -7.33, 'z'), ('move', 7.0, 'y'), ('rot', -pi/2, 'z')]),
+
+        # extrusion connectors at the corners, turned a quarter more at each corner
+        PartPattern('extCon', 'extCon', (2, 2), (l, 20.0), order='ring', turn=(-pi/2, 'y'),
+                    first=[('rot', pi/2, 'x'), ('move', 4.0, 'x'), ('move', d/2 - 10, 'y')]),
+        # extrusion connectors on both sides of the posts, the left ones face the other way
+        PartPattern('extCon', 'extCon', (2, 2), (20.0, 12.0), (l/2 - 10, 4.0, 4.0), [('rot', -pi/2, 'x')],
+                    [Mirror('x', [('rot', pi, 'z')], 'low')], start=5),
+    )
+
+    occurrences = tuple(occ for pattern in patterns for occ in place(pattern)) + (
+        # robot mounting flange
+        _occurrence('flange', 'flange', ops=[('rot', pi/2, 'x'), ('move', l/2 + 4, 'x'), ('move', d/2, 'y'), ('move', h+4, 'z')]),
+    )
+
+    # BOM lines in the order of the exported sheet
+    bom_order = ('length', 'depth', 'height', 'cap', 'extCon', 'wheelCon', 'wheel', 'flange')
+    by_key = {comp.key: comp for comp in components}
+    bom = tuple(
+        BomLine(by_key[key].part, sum(1 for occ in occurrences if occ.component == key))
+        for key in bom_order
+    )
+
+    return PedestalPlan(d, l, h, components, occurrences, bom)
+
+
+@functools.lru_cache(maxsize=64)
+def cached_plan(depth, length, height):
+    "plan_pedestal of recently used dimensions, the plans are immutable so they are shared"
+    return plan_pedestal(depth, length, height)
+
+
+def dependencies(pedestalPlan):
+    """Find the components and occurrences that depend on each dimension.
+
+    Every dimension is changed in turn and the resulting plan is compared with
+    the given one. Returns a dict from the name of the dimension to its
+    Dependencies.
+    """
+    result = {}
+    for dim in DIMENSIONS:
+        dims = {name: getattr(pedestalPlan, name) for name in DIMENSIONS}
+        dims[dim] += 1.0
+        other = plan_pedestal(**dims)
+        result[dim] = Dependencies(
+            frozenset(a.key for a, b in zip(pedestalPlan.components, other.components) if a != b),
+            frozenset(a.role for a, b in zip(pedestalPlan.occurrences, other.occurrences) if a.transform != b.transform),
+        )
+    return result
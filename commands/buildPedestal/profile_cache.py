@@ -0,0 +1,96 @@
+# Import-once cache of the extrusion profile sketch.
+#
+# The three extrusions of a pedestal use the same DXF profile on different
+# construction planes. The DXF is imported once per design and its profile
+# is chosen once; the next extrusions get a copy of the imported sketch on
+# their own plane, and their profile is found by the index and loop count
+# of the chosen one instead of scanning every profile again.
+
+import adsk.core
+
+from ...lib import fusion360utils as futil
+
+
+def most_loops(profiles):
+    "Index and loop count of the profile with the most loops, (None, 0) if there is none"
+    index, loops = None, 0
+    for i in range(profiles.count):
+        count = profiles.item(i).profileLoops.count
+        if index is None or count > loops:
+            index, loops = i, count
+    return index, loops
+
+
+class _ProfileSketch:
+    "A sketch imported from a DXF file and the signature of its extrusion profile"
+    def __init__(self, sketch, index, loops):
+        self.sketch = sketch
+        self.index = index # index of the chosen profile in the sketch profiles
+        self.loops = loops # its loop count, to check the profile found at the index of a copy
+        curves = adsk.core.ObjectCollection.create()
+        sketchCurves = sketch.sketchCurves
+        for i in range(sketchCurves.count):
+            curves.add(sketchCurves.item(i))
+        self.curves = curves
+
+
+class ProfileCache:
+    def __init__(self):
+        self._sketches = {} # path -> _ProfileSketch of each design
+        self.imports = 0
+        self.copies = 0
+
+    def _get(self, path, design):
+        sketches = self._sketches.get(path, [])
+        # Drop the sketches deleted since they were imported
+        sketches[:] = [known for known in sketches if known.sketch.isValid]
+        for known in sketches:
+            if known.sketch.parentComponent.parentDesign == design:
+                return known
+        return None
+
+    def profile(self, importManager, path, comp, plane):
+        """The extrusion profile of the DXF file in a sketch of the component on the plane.
+
+        The file is only imported when no sketch from it exists in the design
+        of the component yet, otherwise the existing sketch is copied.
+        """
+        known = self._get(path, comp.parentDesign)
+        if known is None:
+            # Get dxf import options
+            dxfOptions = importManager.createDXF2DImportOptions(path, plane)
+            dxfOptions.isViewFit = True
+            dxfOptions.isSingleSketchResult = True
+            with futil.timed('importToTarget DXF'):
+                importManager.importToTarget(dxfOptions, comp)
+            self.imports += 1
+
+            sketch = comp.sketches.item(comp.sketches.count - 1)
+            index, loops = most_loops(sketch.profiles)
+            if index is None:
+                return None
+            self._sketches.setdefault(path, []).append(_ProfileSketch(sketch, index, loops))
+            return sketch.profiles.item(index)
+
+        # The sketch coordinates are kept, so the copy lies on the new plane like an import would
+        sketch = comp.sketches.add(plane)
+        known.sketch.copy(known.curves, adsk.core.Matrix3D.create(), sketch)
+        self.copies += 1
+
+        profiles = sketch.profiles
+        if known.index < profiles.count:
+            profile = profiles.item(known.index)
+            if profile.profileLoops.count == known.loops:
+                return profile
+        # The profiles of the copy aren't in the same order, look for the profile again
+        index, loops = most_loops(profiles)
+        return profiles.item(index) if index is not None else None
+
+    def clear(self):
+        self._sketches.clear()
+
+    def report(self):
+        return {
+            'imports': self.imports,
+            'copies': self.copies,
+        }
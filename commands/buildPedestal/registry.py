@@ -0,0 +1,61 @@
+# Role index of the occurrences created by the pedestal builder.
+#
+# Every occurrence the builder creates is tagged with two attributes: the id
+# of the pedestal it belongs to and its role in the plan ('cap1', 'wheel3',
+# 'flange', ...). The registry keeps a dict from the tags to the occurrences,
+# so parts are addressed directly even in designs that contain other
+# geometry, and the index can be rebuilt from the attributes of a design.
+
+import uuid
+
+ATTRIBUTE_GROUP = 'DeepClaw'
+PEDESTAL_ATTRIBUTE = 'pedestal'
+ROLE_ATTRIBUTE = 'role'
+
+
+def new_pedestal_id():
+    return uuid.uuid4().hex
+
+
+class OccurrenceRegistry:
+    def __init__(self):
+        self._index = {} # pedestal id -> {role: occurrence}
+
+    def register(self, pedestalId, role, occurrence):
+        "Tag the occurrence and add it to the index"
+        occurrence.attributes.add(ATTRIBUTE_GROUP, PEDESTAL_ATTRIBUTE, pedestalId)
+        occurrence.attributes.add(ATTRIBUTE_GROUP, ROLE_ATTRIBUTE, role)
+        self._index.setdefault(pedestalId, {})[role] = occurrence
+
+    def get(self, pedestalId, role):
+        "The occurrence with the role in the pedestal, or None if it doesn't exist anymore"
+        occurrence = self._index.get(pedestalId, {}).get(role)
+        if occurrence is not None and not occurrence.isValid:
+            del self._index[pedestalId][role]
+            return None
+        return occurrence
+
+    def occurrences(self, pedestalId):
+        "Dict from role to occurrence of the pedestal"
+        return self._index.setdefault(pedestalId, {})
+
+    def pedestals(self):
+        return list(self._index)
+
+    def forget(self, pedestalId):
+        self._index.pop(pedestalId, None)
+
+    def load(self, design):
+        """Index the tagged occurrences of a design.
+
+        Used for designs built in another session, the attributes are scanned
+        once and the next lookups go through the index.
+        """
+        for attribute in design.findAttributes(ATTRIBUTE_GROUP, ROLE_ATTRIBUTE):
+            occurrence = attribute.parent
+            if occurrence is None:
+                continue
+            pedestal = occurrence.attributes.itemByName(ATTRIBUTE_GROUP, PEDESTAL_ATTRIBUTE)
+            if pedestal is None:
+                continue
+            self._index.setdefault(pedestal.value, {})[attribute.value] = occurrence
@@ -0,0 +1,134 @@
+# Pedestal parameters stored in the design.
+#
+# The parameters of a pedestal are saved as an attribute on the component
+# the pedestal is built in, so they follow the design instead of the
+# add-in session: exports work on any open design, for every pedestal of
+# the design, and after the add-in is restarted.
+
+import json
+import os
+import time
+from typing import NamedTuple
+
+from .registry import ATTRIBUTE_GROUP
+
+PARAMETERS_ATTRIBUTE = 'parameters'
+
+
+class PedestalState(NamedTuple):
+    id: str
+    component: object   # the adsk.fusion.Component the pedestal is built in
+    depth: float        # cm
+    length: float       # cm
+    height: float       # cm
+    created: float      # time.time() of the first build
+
+
+def save(component, pedestalId, depth, length, height, created=None):
+    "Store the parameters of the pedestal on its component"
+    state = PedestalState(pedestalId, component, float(depth), float(length), float(height), created or time.time())
+    value = json.dumps({
+        'id': state.id,
+        'depth': state.depth,
+        'length': state.length,
+        'height': state.height,
+        'created': state.created,
+    })
+    component.attributes.add(ATTRIBUTE_GROUP, PARAMETERS_ATTRIBUTE, value)
+    index.update(component.parentDesign, state)
+    return state
+
+
+def _from_attribute(attribute):
+    component = attribute.parent
+    if component is None:
+        return None
+    try:
+        values = json.loads(attribute.value)
+        return PedestalState(values['id'], component, values['depth'], values['length'], values['height'], values['created'])
+    except (ValueError, KeyError):
+        return None
+
+
+class PedestalIndex:
+    """Pedestals of each design, by pedestal id.
+
+    A design is scanned with findAttributes the first time it is looked up;
+    builds of the session keep the index up to date through save().
+    """
+
+    def __init__(self):
+        self._designs = [] # (design, {pedestal id: PedestalState})
+
+    def _entry(self, design):
+        # Drop the designs whose document has been closed
+        self._designs = [(known, pedestals) for known, pedestals in self._designs if known.isValid]
+        for known, pedestals in self._designs:
+            if known == design:
+                return pedestals
+        pedestals = {}
+        for attribute in design.findAttributes(ATTRIBUTE_GROUP, PARAMETERS_ATTRIBUTE):
+            state = _from_attribute(attribute)
+            if state:
+                pedestals[state.id] = state
+        self._designs.append((design, pedestals))
+        return pedestals
+
+    def update(self, design, state):
+        self._entry(design)[state.id] = state
+
+    def pedestals(self, design):
+        "The pedestals of the design which still exist, oldest first"
+        pedestals = self._entry(design)
+        for pedestalId in [key for key, state in pedestals.items() if not state.component.isValid]:
+            del pedestals[pedestalId]
+        return sorted(pedestals.values(), key=lambda state: state.created)
+
+    def get(self, design, pedestalId):
+        state = self._entry(design).get(pedestalId)
+        if state and state.component.isValid:
+            return state
+        return None
+
+    def latest(self, design):
+        pedestals = self.pedestals(design)
+        return pedestals[-1] if pedestals else None
+
+
+def file_names(names):
+    """A file name for each name, without extension.
+
+    Characters which aren't allowed in file names are replaced by '_'.
+    Names which give the same file name, like 'A/1' and 'A_1', are numbered
+    '_2', '_3'... so no file overwrites another one. The names are compared
+    ignoring case as the file systems of Windows and macOS do.
+    """
+    fileNames = []
+    used = set()
+    for name in names:
+        safe = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in name)
+        fileName = safe
+        count = 1
+        while fileName.lower() in used:
+            count += 1
+            fileName = f'{safe}_{count}'
+        used.add(fileName.lower())
+        fileNames.append(fileName)
+    return fileNames
+
+
+def export_names(pedestals, filename):
+    """Pair each pedestal with the file it is exported to.
+
+    A single pedestal is exported to the chosen file, several pedestals get
+    the file name of their component, from file_names, appended to it.
+    """
+    if len(pedestals) == 1:
+        return [(pedestals[0], filename)]
+    base, ext = os.path.splitext(filename)
+    suffixes = file_names([pedestal.component.name for pedestal in pedestals])
+    return [(pedestal, f'{base}_{suffix}{ext}') for pedestal, suffix in zip(pedestals, suffixes)]
+
+
+# Shared by the build and export commands
+index = PedestalIndex()
@@ -0,0 +1,78 @@
+# Plain 4x4 transforms for planning occurrence placements without Fusion 360.
+#
+# A transform is a flat tuple of 16 floats in row-major order, the same
+# layout as adsk.core.Matrix3D.asArray(), so a composed transform is written
+# to an occurrence with a single Matrix3D.setWithArray().
+
+import math
+
+AXES = {'x': 0, 'y': 1, 'z': 2}
+
+
+def identity():
+    return (1.0, 0.0, 0.0, 0.0,
+            0.0, 1.0, 0.0, 0.0,
+            0.0, 0.0, 1.0, 0.0,
+            0.0, 0.0, 0.0, 1.0)
+
+
+def translation_matrix(x=0.0, y=0.0, z=0.0):
+    return (1.0, 0.0, 0.0, float(x),
+            0.0, 1.0, 0.0, float(y),
+            0.0, 0.0, 1.0, float(z),
+            0.0, 0.0, 0.0, 1.0)
+
+
+class TransformComposer:
+    """Accumulate the rotations and translations of an occurrence.
+
+    rotate() turns the occurrence around one of its own axes, like rotBySelf
+    did, and translate() moves it along a world axis, like translation did.
+    Nothing is written to Fusion 360; read the result from matrix.
+    """
+
+    def __init__(self, initial=None):
+        self._m = list(initial or identity())
+
+    @property
+    def matrix(self):
+        return tuple(self._m)
+
+    def rotate(self, angle, axis):
+        "Rotate around the own axis of the occurrence, through its origin"
+        i = AXES[axis]
+        j, k = (i + 1) % 3, (i + 2) % 3
+        c = math.cos(angle)
+        s = math.sin(angle)
+        m = self._m
+        # Post-multiplying by a rotation only mixes the columns j and k
+        for row in range(0, 12, 4):
+            mj = m[row + j]
+            mk = m[row + k]
+            m[row + j] = mj * c + mk * s
+            m[row + k] = mk * c - mj * s
+        return self
+
+    def translate(self, distance, axis):
+        "Move along the world axis"
+        self._m[AXES[axis] * 4 + 3] += distance
+        return self
+
+    def move(self, x=0.0, y=0.0, z=0.0):
+        "Move by a world vector"
+        m = self._m
+        m[3] += x
+        m[7] += y
+        m[11] += z
+        return self
+
+    def apply(self, ops):
+        "Apply a sequence of ('rot', angle, axis) and ('move', distance, axis) operations"
+        for op, value, axis in ops:
+            if op == 'rot':
+                self.rotate(value, axis)
+            elif op == 'move':
+                self.translate(value, axis)
+            else:
+                raise ValueError(f'Unknown operation: {op}')
+        return self
@@ -0,0 +1,168 @@
+import adsk.core, adsk.fusion, adsk.cam, traceback
+import os
+import json
+import zipfile
+
+from ...lib import fusion360utils as futil
+from ... import config
+from ..buildPedestal import plan
+from ..buildPedestal import state as pedestalState
+from ..exportBOM import entry as exportBOM
+from ..exportDrawings import entry as exportDrawings
+from .. import export_worker
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# *** Specify the command identity information. ***
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_ExportAll'
+CMD_NAME = 'Export All'
+CMD_Description = 'Export the BOM, the Enginneering Drawing and the Parameters of the DeepClaw Base at once'
+
+# Specify that the command will be promoted to the panel.
+IS_PROMOTED = False
+
+# *** Define the location where the command button will be created. ***
+# This is done by specifying the workspace, the tab, and the panel, and the
+# command it will be inserted beside. Not providing the command to position
+# it will insert it at the end.
+WORKSPACE_ID = 'FusionSolidEnvironment'
+PANEL_ID = 'SolidScriptsAddinsPanel'
+COMMAND_BESIDE_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_BOM'
+
+# Resource location for command icons, here we assume a sub folder in this directory named "resources".
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
+
+# The base name of the exported files, chosen by the user
+_export_files = {'base': ''}
+
+# Executed when add-in is run.
+def start():
+    try:
+        # Create a command Definition.
+        cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
+
+        # Define an event handler for the command created event.
+        # It will be called when button is clicked.
+        futil.add_handler(cmd_def.commandCreated, command_created)
+
+        # **** Add a button into the UI so the user can run the command. ****
+        # Get the target workspace the button will be created in.
+        workspace = ui.workspaces.itemById(WORKSPACE_ID)
+
+        # Get the panel the button will be created in.
+        panel = workspace.toolbarPanels.itemById(PANEL_ID)
+
+        # Create the button command control in the UI after the specified existing command.
+        control = panel.controls.addCommand(cmd_def, COMMAND_BESIDE_ID, False)
+
+        # Specify if the command is promoted to the main toolbar
+        control.isPromoted = IS_PROMOTED
+    except:
+        if ui:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+# Executed when add-in is stopped
+def stop():
+    try:
+        # Get the various UI elements for this command
+        workspace = ui.workspaces.itemById(WORKSPACE_ID)
+        panel = workspace.toolbarPanels.itemById(PANEL_ID)
+        command_control = panel.controls.itemById(CMD_ID)
+        command_definition = ui.commandDefinitions.itemById(CMD_ID)
+
+        # Delete the button command control
+        if command_control:
+            command_control.deleteMe()
+
+        # Delete the command definition
+        if command_definition:
+            command_definition.deleteMe()
+    except:
+        if ui:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    try:
+        # General logging for debug
+        futil.log(f'{CMD_NAME} Command Created Event')
+
+        # Ask user input the output file name, the .xls, .pdf and .json files share its base name
+        fileDialog = ui.createFileDialog()
+        fileDialog.isMultiSelectEnabled = False
+        fileDialog.title = "Specify result filename"
+        fileDialog.filter = 'Zip files (*.zip)'
+        fileDialog.filterIndex = 0
+        dialogResult = fileDialog.showSave()
+        if dialogResult == adsk.core.DialogResults.DialogOK:
+            _export_files['base'] = os.path.splitext(fileDialog.filename)[0]
+        else:
+            return
+
+        # Create the check box to bundle the files in a zip archive
+        inputs = args.command.commandInputs
+        inputs.addBoolValueInput('bundleValue', 'Bundle as Zip', True, '', True)
+
+        # Connect to the events that are need by this command.
+        futil.add_handler(args.command.execute, command_execute, command=args.command)
+
+    except:
+        if ui:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+def command_execute(args: adsk.core.CommandEventArgs):
+    try:
+        eventArgs = adsk.core.CommandEventArgs.cast(args)
+        bundle = eventArgs.command.commandInputs.itemById('bundleValue').value
+
+        # Export every pedestal of the active design from its stored parameters
+        design = adsk.fusion.Design.cast(app.activeProduct)
+        pedestals = pedestalState.index.pedestals(design) if design else []
+        if pedestals:
+            exportBOM.load_libraries()
+            exportDrawings.load_libraries()
+            for pedestal, base in pedestalState.export_names(pedestals, _export_files['base']):
+                # The plan is computed once and shared by the three files
+                pedestalPlan = plan.plan_pedestal(pedestal.depth, pedestal.length, pedestal.height)
+                parameters = {'id': pedestal.id, 'component': pedestal.component.name}
+                export_worker.submit(os.path.basename(base), export_all, pedestalPlan, parameters, base, bundle)
+        else:
+            ui.messageBox("The DeepClaw Base Model Haven't Generated!")
+    except:
+        if ui:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+def export_all(pedestalPlan, parameters, base, bundle):
+    """Write the BOM, the drawing and the manifest of a pedestal plan.
+
+    The files are named base.xls, base.pdf and base.json, and are also
+    bundled in base.zip when bundle is True. Doesn't use the Fusion 360 API
+    so it can run on a worker thread. Returns the written files.
+    """
+    files = [base + '.xls', base + '.pdf', base + '.json']
+    exportBOM.write_plan_BOM(pedestalPlan, files[0])
+    exportDrawings.write_drawing(pedestalPlan.length, pedestalPlan.depth, pedestalPlan.height, files[1])
+    with open(files[2], 'w') as f:
+        json.dump(manifest(pedestalPlan, parameters, files), f, indent=2)
+
+    if bundle:
+        with zipfile.ZipFile(base + '.zip', 'w', zipfile.ZIP_DEFLATED) as archive:
+            for fileName in files:
+                archive.write(fileName, os.path.basename(fileName))
+        files.append(base + '.zip')
+    return files
+
+def manifest(pedestalPlan, parameters, files):
+    "The parameters, BOM and part placements of a pedestal plan"
+    return {
+        **parameters,
+        'units': 'cm',
+        'depth': pedestalPlan.depth,
+        'length': pedestalPlan.length,
+        'height': pedestalPlan.height,
+        'bom': [{'part': line.part, 'quantity': line.quantity} for line in pedestalPlan.bom],
+        'occurrences': [
+            {'role': occ.role, 'component': occ.component, 'transform': list(occ.transform)}
+            for occ in pedestalPlan.occurrences
+        ],
+        'files': [os.path.basename(fileName) for fileName in files],
+    }
@@ -1,11 +1,15 @@
 # -*- coding: cp1252 -*-
-from struct import pack
+from array import array
+from bisect import bisect_right
+from struct import pack, pack_into
 from .UnicodeUtils import upack1, upack2, upack2rt
 from .compat import basestring, unicode, unicode_type, xrange, iteritems
 
 class SharedStringTable(object):
     _SST_ID = 0x00FC
     _CONTINUE_ID = 0x003C
+    # Size limit of the data of the SST and CONTINUE records
+    _MAX_RECORD_DATA = 0x2020
 
     def __init__(self, encoding):
         self.encoding = encoding
@@ -13,12 +17,16 @@ class SharedStringTable(object):
         self._rt_indexes = {}
         self._tally = []
         self._add_calls = 0
-        # Following 3 attrs are used for temporary storage in the
-        # get_biff_record() method and methods called by it. The pseudo-
-        # initialisation here is for documentation purposes only.
-        self._sst_record = None
-        self._continues = None
-        self._current_piece = None
+        # Each unique string is encoded when it is first added, compressed
+        # or UTF-16LE: its packed form starts at _offsets[idx] in _encoded.
+        # The formatting runs of the rich text strings are kept in _rt_runs.
+        self._encoded = bytearray()
+        self._offsets = array('L')
+        self._rt_runs = {}
+        # Strings per EXTSST portion and the positions of the first string
+        # of each portion, set by get_biff_record()
+        self._portion_len = 8
+        self._portions = []
 
     def add_str(self, s):
         if self.encoding != 'ascii' and not isinstance(s, unicode_type):
@@ -26,8 +34,11 @@ class SharedStringTable(object):
         self._add_calls += 1
         if s not in self._str_indexes:
             idx = len(self._str_indexes) + len(self._rt_indexes)
+            u_str = upack2(s, self.encoding)
             self._str_indexes[s] = idx
             self._tally.append(1)
+            self._offsets.append(len(self._encoded))
+            self._encoded += u_str
         else:
             idx = self._str_indexes[s]
             self._tally[idx] += 1
@@ -43,8 +54,12 @@ class SharedStringTable(object):
         self._add_calls += 1
         if rt not in self._rt_indexes:
             idx = len(self._str_indexes) + len(self._rt_indexes)
+            rt_str, rt_fr = upack2rt(rt, self.encoding)
             self._rt_indexes[rt] = idx
             self._tally.append(1)
+            self._offsets.append(len(self._encoded))
+            self._encoded += rt_str
+            self._rt_runs[idx] = rt_fr
         else:
             idx = self._rt_indexes[rt]
             self._tally[idx] += 1
@@ -64,106 +79,105 @@ class SharedStringTable(object):
         return self._rt_indexes[rt]
 
     def get_biff_record(self):
-        self._sst_record = b''
-        self._continues = [None, None]
-        self._current_piece = pack('<II', 0, 0)
-        data = [(idx, s) for s, idx in iteritems(self._str_indexes)]
-        data.extend((idx, s) for s, idx in iteritems(self._rt_indexes))
-        data.sort() # in index order
-        for idx, s in data:
+        # The SST record and its CONTINUE records are assembled in a single
+        # pass. A string which doesn't fit in the current record is split:
+        # its header and 1st sym are never separated, and each following
+        # piece starts a CONTINUE record with the options byte.
+        max_len = self._MAX_RECORD_DATA
+        buf = memoryview(self._encoded)
+        str_count = len(self._offsets)
+        bounds = self._offsets[:]
+        bounds.append(len(self._encoded))
+        empty = upack2(u'')
+        portion_len = max(8, -(-str_count // 128)) # up to 128 EXTSST portions
+        portions = []
+        # Without rich text and deleted strings, the strings which fit in
+        # the current record are copied at once
+        plain = not self._rt_runs and 0 not in self._tally
+
+        result = bytearray(pack('<2HII', self._SST_ID, 0, self._add_calls, str_count))
+        rec_pos = 0   # position of the header of the current record
+        rec_len = 8   # length of the data of the current record
+
+        idx = 0
+        while idx < str_count:
+            if plain:
+                start = bounds[idx]
+                stop = bisect_right(bounds, start + max_len - rec_len, idx + 1) - 1
+                if stop > idx:
+                    shift = len(result) - start
+                    for k in xrange(-(-idx // portion_len) * portion_len, stop, portion_len):
+                        portions.append((bounds[k] + shift, bounds[k] + shift - rec_pos))
+                    result += buf[start:bounds[stop]]
+                    rec_len += bounds[stop] - start
+                    idx = stop
+                    if idx == str_count:
+                        break
+
+            rt_fr = None
             if self._tally[idx] == 0:
-                s = u''
-            if isinstance(s, basestring):
-                self._add_to_sst(s)
+                s = empty
+                is_unicode_str = False
             else:
-                self._add_rt_to_sst(s)
-        del data
-        self._new_piece()
-        self._continues[0] = pack('<2HII', self._SST_ID, len(self._sst_record), self._add_calls, len(self._str_indexes) + len(self._rt_indexes))
-        self._continues[1] = self._sst_record[8:]
-        self._sst_record = None
-        self._current_piece = None
-        result = b''.join(self._continues)
-        self._continues = None
-        return result
-
-
-    def _add_to_sst(self, s):
-        u_str = upack2(s, self.encoding)
-
-        is_unicode_str = u_str[2] == b'\x01'[0]
-        if is_unicode_str:
-            atom_len = 5 # 2 byte -- len,
-                         # 1 byte -- options,
-                         # 2 byte -- 1st sym
-        else:
-            atom_len = 4 # 2 byte -- len,
-                         # 1 byte -- options,
-                         # 1 byte -- 1st sym
-
-        self._save_atom(u_str[0:atom_len])
-        self._save_splitted(u_str[atom_len:], is_unicode_str)
-	
-    def _add_rt_to_sst(self, rt):
-        rt_str, rt_fr = upack2rt(rt, self.encoding)
-        is_unicode_str = rt_str[2] == b'\x09'[0]
-        if is_unicode_str:
-            atom_len = 7 # 2 byte -- len,
-                         # 1 byte -- options,
-                         # 2 byte -- number of rt runs
-                         # 2 byte -- 1st sym
-        else:
-            atom_len = 6 # 2 byte -- len,
-                         # 1 byte -- options,
-                         # 2 byte -- number of rt runs
-                         # 1 byte -- 1st sym
-        self._save_atom(rt_str[0:atom_len])
-        self._save_splitted(rt_str[atom_len:], is_unicode_str)
-        for i in range(0, len(rt_fr), 4):
-            self._save_atom(rt_fr[i:i+4])
-
-    def _new_piece(self):
-        if self._sst_record == b'':
-            self._sst_record = self._current_piece
-        else:
-            curr_piece_len = len(self._current_piece)
-            self._continues.append(pack('<2H%ds'%curr_piece_len, self._CONTINUE_ID, curr_piece_len, self._current_piece))
-        self._current_piece = b''
-
-    def _save_atom(self, s):
-        atom_len = len(s)
-        free_space = 0x2020 - len(self._current_piece)
-        if free_space < atom_len:
-            self._new_piece()
-        self._current_piece += s
-
-    def _save_splitted(self, s, is_unicode_str):
-        i = 0
-        str_len = len(s)
-        while i < str_len:
-            piece_len = len(self._current_piece)
-            free_space = 0x2020 - piece_len
-            tail_len = str_len - i
-            need_more_space = free_space < tail_len
-
-            if not need_more_space:
-                atom_len = tail_len
+                s = buf[bounds[idx]:bounds[idx + 1]]
+                is_unicode_str = self._encoded[bounds[idx] + 2] & 0x01
+                rt_fr = self._rt_runs.get(idx)
+            str_len = len(s)
+            if rt_fr is None:
+                atom_len = 5 if is_unicode_str else 4 # len, options, 1st sym
             else:
-                if is_unicode_str:
-                    atom_len = free_space & 0xFFFE
-                else:
-                    atom_len = free_space
-
-            self._current_piece += s[i:i+atom_len]
-
-            if need_more_space:
-                self._new_piece()
-                if is_unicode_str:
-                    self._current_piece += b'\x01'
-                else:
-                    self._current_piece += b'\x00'
-
-            i += atom_len
+                atom_len = 7 if is_unicode_str else 6 # len, options, number of rt runs, 1st sym
+
+            if max_len - rec_len < min(atom_len, str_len):
+                pack_into('<H', result, rec_pos + 2, rec_len)
+                rec_pos = len(result)
+                result += pack('<2H', self._CONTINUE_ID, 0)
+                rec_len = 0
+            if idx % portion_len == 0:
+                portions.append((len(result), len(result) - rec_pos))
+
+            if str_len <= max_len - rec_len:
+                result += s
+                rec_len += str_len
+            else:
+                result += s[:atom_len]
+                rec_len += atom_len
+                i = atom_len
+                while i < str_len:
+                    free_space = max_len - rec_len
+                    if str_len - i <= free_space:
+                        result += s[i:]
+                        rec_len += str_len - i
+                        break
+                    if is_unicode_str:
+                        free_space &= 0xFFFE
+                    result += s[i:i + free_space]
+                    i += free_space
+                    pack_into('<H', result, rec_pos + 2, rec_len + free_space)
+                    rec_pos = len(result)
+                    result += pack('<2HB', self._CONTINUE_ID, 0, is_unicode_str)
+                    rec_len = 1
+
+            if rt_fr:
+                for i in xrange(0, len(rt_fr), 4):
+                    if max_len - rec_len < 4:
+                        pack_into('<H', result, rec_pos + 2, rec_len)
+                        rec_pos = len(result)
+                        result += pack('<2H', self._CONTINUE_ID, 0)
+                        rec_len = 0
+                    result += rt_fr[i:i+4]
+                    rec_len += 4
+            idx += 1
+
+        pack_into('<H', result, rec_pos + 2, rec_len)
+        self._portion_len = portion_len
+        self._portions = portions
+        return bytes(result)
+
+    def get_ext_sst_record(self, sst_stream_pos):
+        # EXTSST of the SST last returned by get_biff_record(), which is
+        # written at sst_stream_pos in the Workbook stream
+        return ExtSSTRecord(sst_stream_pos, self._portion_len, self._portions).get()
 
 
 class BiffRecord(object):
@@ -949,30 +963,28 @@ class XFRecord(BiffRecord):
         else:
             used_attr = pack('B', 0xF4)
 
-        if borders.left == borders.NO_LINE:
-            borders.left_colour = 0x00
-        if borders.right == borders.NO_LINE:
-            borders.right_colour = 0x00
-        if borders.top == borders.NO_LINE:
-            borders.top_colour = 0x00
-        if borders.bottom == borders.NO_LINE:
-            borders.bottom_colour = 0x00
-        if borders.diag == borders.NO_LINE:
-            borders.diag_colour = 0x00
+        # The colour of a missing line is written as 0, the borders are
+        # left unchanged as they may be shared by other styles
+        no_line = borders.NO_LINE
+        left_colour = borders.left_colour if borders.left != no_line else 0x00
+        right_colour = borders.right_colour if borders.right != no_line else 0x00
+        top_colour = borders.top_colour if borders.top != no_line else 0x00
+        bottom_colour = borders.bottom_colour if borders.bottom != no_line else 0x00
+        diag_colour = borders.diag_colour if borders.diag != no_line else 0x00
         brd1 = pack('<L',
             ((borders.left          & 0x0F) << 0 ) |
             ((borders.right         & 0x0F) << 4 ) |
             ((borders.top           & 0x0F) << 8 ) |
             ((borders.bottom        & 0x0F) << 12) |
-            ((borders.left_colour   & 0x7F) << 16) |
-            ((borders.right_colour  & 0x7F) << 23) |
+            ((left_colour           & 0x7F) << 16) |
+            ((right_colour          & 0x7F) << 23) |
             ((borders.need_diag1    & 0x01) << 30) |
             ((borders.need_diag2    & 0x01) << 31)
         )
         brd2 = pack('<L',
-            ((borders.top_colour    & 0x7F) << 0 ) |
-            ((borders.bottom_colour & 0x7F) << 7 ) |
-            ((borders.diag_colour   & 0x7F) << 14) |
+            ((top_colour            & 0x7F) << 0 ) |
+            ((bottom_colour         & 0x7F) << 7 ) |
+            ((diag_colour           & 0x7F) << 14) |
             ((borders.diag          & 0x0F) << 21) |
             ((pattern.pattern       & 0x3F) << 26)
         )
@@ -1188,27 +1200,12 @@ class ExtSSTRecord(BiffRecord):
     """
     _REC_ID = 0x00FF
 
-    def __init__(self, sst_stream_pos, str_placement, portions_len):
-        extsst = {}
-        abs_stream_pos = sst_stream_pos
-        str_counter = 0
-        portion_counter = 0
-        while str_counter < len(str_placement):
-            str_chunk_num, pos_in_chunk = str_placement[str_counter]
-            if str_chunk_num != portion_counter:
-                portion_counter = str_chunk_num
-                abs_stream_pos += portions_len[portion_counter-1]
-                #print hex(abs_stream_pos)
-            str_stream_pos = abs_stream_pos + pos_in_chunk + 4 # header
-            extsst[str_counter] = (pos_in_chunk, str_stream_pos)
-            str_counter += 1
-
-        exsst_str_count_delta = max(8, len(str_placement)*8/0x2000) # maybe smth else?
-        self._rec_data = pack('<H', exsst_str_count_delta)
-        str_counter = 0
-        while str_counter < len(str_placement):
-            self._rec_data += pack('<IHH', extsst[str_counter][1], extsst[str_counter][0], 0)
-            str_counter += exsst_str_count_delta
+    def __init__(self, sst_stream_pos, portion_len, portions):
+        # portions holds the position of the first string of each portion
+        # from the start of the SST record and inside its current record
+        self._rec_data = pack('<H', portion_len) + b''.join(
+            pack('<IHH', sst_stream_pos + stream_pos, rec_pos, 0)
+            for stream_pos, rec_pos in portions)
 
 class DimensionsRecord(BiffRecord):
     """
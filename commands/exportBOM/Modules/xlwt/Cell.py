@@ -1,6 +1,7 @@
 # -*- coding: windows-1252 -*-
 
-from struct import unpack, pack
+from math import copysign
+from struct import pack, Struct
 from . import BIFFRecords
 from .compat import xrange
 
@@ -42,6 +43,54 @@ class MulBlankCell(object):
         return BIFFRecords.MulBlankRecord(self.rowx,
             self.colx1, self.colx2, self.xf_idx).get()
 
+# A double as a signed 64-bit integer, to look at its bits
+_double_bits = Struct('<d')
+_int64 = Struct('<q')
+
+def _rk_encode(num):
+    # The RK encoding of a float, None if it can't be encoded exactly.
+    #
+    # The four possible kinds of RK encoding are *not* mutually exclusive.
+    # The 30-bit integer variety picks up the most.
+    # In the code below, the four varieties are checked in descending order
+    # of bangs per buck.
+    # SJM 2007-10-01
+
+    if -0x20000000 <= num < 0x20000000: # fits in 30-bit *signed* int
+        inum = int(num)
+        if inum == num: # survives round-trip
+            if inum or copysign(1.0, num) > 0:
+                # print "30-bit integer RK", inum, hex(inum)
+                return 2 | (inum << 2)
+            # -0.0 keeps its sign as a float RK
+            return _int64.unpack(_double_bits.pack(num))[0] >> 32
+
+    temp = num * 100
+
+    if -0x20000000 <= temp < 0x20000000:
+        # That was step 1: the coded value will fit in
+        # a 30-bit signed integer.
+        itemp = int(round(temp, 0))
+        # That was step 2: "itemp" is the best candidate coded value.
+        # Now for step 3: simulate the decoding,
+        # to check for round-trip correctness.
+        if itemp / 100.0 == num:
+            # print "30-bit integer RK*100", itemp, hex(itemp)
+            return 3 | (itemp << 2)
+
+    # The most significant 30 bits of the double, when its 34 lsb are 0,
+    # like the large round numbers beyond the 30-bit integers.
+    # The float RK*100 variety isn't tried: it costs another pack+unpack
+    # for every number left and hardly ever applies.
+    bits = _int64.unpack(_double_bits.pack(num))[0]
+    if not bits & 0x3FFFFFFFF:
+        # print "float RK", bits >> 32, hex(bits >> 32)
+        return bits >> 32
+
+    #print "Number"
+    #print
+    return None
+
 class NumberCell(object):
     __slots__ = ["rowx", "colx", "xf_idx", "number"]
 
@@ -52,54 +101,10 @@ class NumberCell(object):
         self.number = float(number)
 
     def get_encoded_data(self):
-        rk_encoded = 0
-        num = self.number
-
-        # The four possible kinds of RK encoding are *not* mutually exclusive.
-        # The 30-bit integer variety picks up the most.
-        # In the code below, the four varieties are checked in descending order
-        # of bangs per buck, or not at all.
-        # SJM 2007-10-01
-
-        if -0x20000000 <= num < 0x20000000: # fits in 30-bit *signed* int
-            inum = int(num)
-            if inum == num: # survives round-trip
-                # print "30-bit integer RK", inum, hex(inum)
-                rk_encoded = 2 | (inum << 2)
-                return 1, rk_encoded
-
-        temp = num * 100
-
-        if -0x20000000 <= temp < 0x20000000:
-            # That was step 1: the coded value will fit in
-            # a 30-bit signed integer.
-            itemp = int(round(temp, 0))
-            # That was step 2: "itemp" is the best candidate coded value.
-            # Now for step 3: simulate the decoding,
-            # to check for round-trip correctness.
-            if itemp / 100.0 == num:
-                # print "30-bit integer RK*100", itemp, hex(itemp)
-                rk_encoded = 3 | (itemp << 2)
-                return 1, rk_encoded
-
-        if 0: # Cost of extra pack+unpack not justified by tiny yield.
-            packed = pack('<d', num)
-            w01, w23 = unpack('<2i', packed)
-            if not w01 and not(w23 & 3):
-                # 34 lsb are 0
-                # print "float RK", w23, hex(w23)
-                return 1, w23
-
-            packed100 = pack('<d', temp)
-            w01, w23 = unpack('<2i', packed100)
-            if not w01 and not(w23 & 3):
-                # 34 lsb are 0
-                # print "float RK*100", w23, hex(w23)
-                return 1, w23 | 1
-
-        #print "Number"
-        #print
-        return 0, pack('<5Hd', 0x0203, 14, self.rowx, self.colx, self.xf_idx, num)
+        rk_encoded = _rk_encode(self.number)
+        if rk_encoded is not None:
+            return 1, rk_encoded
+        return 0, pack('<5Hd', 0x0203, 14, self.rowx, self.colx, self.xf_idx, self.number)
 
     def get_biff_data(self):
         isRK, value = self.get_encoded_data()
@@ -166,79 +171,3 @@ class FormulaCell(object):
     def get_biff_data(self):
         return BIFFRecords.FormulaRecord(self.rowx,
             self.colx, self.xf_idx, self.frmla.rpn(), self.calc_flags).get()
-
-# module-level function for *internal* use by the Row module
-
-def _get_cells_biff_data_mul(rowx, cell_items):
-    # Return the BIFF data for all cell records in the row.
-    # Adjacent BLANK|RK records are combined into MUL(BLANK|RK) records.
-    pieces = []
-    nitems = len(cell_items)
-    i = 0
-    while i < nitems:
-        icolx, icell = cell_items[i]
-        if isinstance(icell, NumberCell):
-            isRK, value = icell.get_encoded_data()
-            if not isRK:
-                pieces.append(value) # pre-packed NUMBER record
-                i += 1
-                continue
-            muldata = [(value, icell.xf_idx)]
-            target = NumberCell
-        elif isinstance(icell, BlankCell):
-            muldata = [icell.xf_idx]
-            target = BlankCell
-        else:
-            pieces.append(icell.get_biff_data())
-            i += 1
-            continue
-        lastcolx = icolx
-        j = i
-        packed_record = ''
-        for j in xrange(i+1, nitems):
-            jcolx, jcell = cell_items[j]
-            if jcolx != lastcolx + 1:
-                nexti = j
-                break
-            if not isinstance(jcell, target):
-                nexti = j
-                break
-            if target == NumberCell:
-                isRK, value = jcell.get_encoded_data()
-                if not isRK:
-                    packed_record = value
-                    nexti = j + 1
-                    break
-                muldata.append((value, jcell.xf_idx))
-            else:
-                muldata.append(jcell.xf_idx)
-            lastcolx = jcolx
-        else:
-            nexti = j + 1
-        if target == NumberCell:
-            if lastcolx == icolx:
-                # RK record
-                value, xf_idx = muldata[0]
-                pieces.append(pack('<5Hi', 0x027E, 10, rowx, icolx, xf_idx, value))
-            else:
-                # MULRK record
-                nc = lastcolx - icolx + 1
-                pieces.append(pack('<4H', 0x00BD, 6 * nc + 6, rowx, icolx))
-                pieces.append(b''.join(pack('<Hi', xf_idx, value) for value, xf_idx in muldata))
-                pieces.append(pack('<H', lastcolx))
-        else:
-            if lastcolx == icolx:
-                # BLANK record
-                xf_idx = muldata[0]
-                pieces.append(pack('<5H', 0x0201, 6, rowx, icolx, xf_idx))
-            else:
-                # MULBLANK record
-                nc = lastcolx - icolx + 1
-                pieces.append(pack('<4H', 0x00BE, 2 * nc + 6, rowx, icolx))
-                pieces.append(b''.join(pack('<H', xf_idx) for xf_idx in muldata))
-                pieces.append(pack('<H', lastcolx))
-        if packed_record:
-            pieces.append(packed_record)
-        i = nexti
-    return b''.join(pieces)
-
@@ -248,9 +248,15 @@ class XlsDoc:
                                         
 
     def save(self, file_name_or_filelike_obj, stream):
+        self.save_pieces(file_name_or_filelike_obj, [stream])
+
+    def save_pieces(self, file_name_or_filelike_obj, pieces):
+        # The workbook stream is given as pieces, see write_piece
+        stream_len = sum(piece_len(piece) for piece in pieces)
+
         # 1. Align stream on 0x1000 boundary (and therefore on sector boundary)
-        padding = b'\x00' * (0x1000 - (len(stream) % 0x1000))
-        self.book_stream_len = len(stream) + len(padding)
+        padding = b'\x00' * (0x1000 - (stream_len % 0x1000))
+        self.book_stream_len = stream_len + len(padding)
 
         self._build_directory()
         self._build_sat()
@@ -260,24 +266,50 @@ class XlsDoc:
         we_own_it = not hasattr(f, 'write')
         if we_own_it:
             f = open(file_name_or_filelike_obj, 'w+b')
-        f.write(self.header)
-        f.write(self.packed_MSAT_1st)
-        # There are reports of large writes failing when writing to "network shares" on Windows.
-        # MS says in KB899149 that it happens at 32KB less than 64MB.
-        # This is said to be alleviated by using "w+b" mode instead of "wb".
-        # One xlwt user has reported anomalous results at much smaller sizes,
-        # The fallback is to write the stream in 4 MB chunks.
         try:
-            f.write(stream)
-        except IOError as e:
-            if e.errno != 22: # "Invalid argument" i.e. 'stream' is too big
-                raise # some other problem
-            chunk_size = 4 * 1024 * 1024
-            for offset in xrange(0, len(stream), chunk_size):
-                f.write(buffer(stream, offset, chunk_size))
-        f.write(padding)
-        f.write(self.packed_MSAT_2nd)
-        f.write(self.packed_SAT)
-        f.write(self.dir_stream)
-        if we_own_it:
-            f.close()
+            f.write(self.header)
+            f.write(self.packed_MSAT_1st)
+            for piece in pieces:
+                write_piece(f, piece)
+            f.write(padding)
+            f.write(self.packed_MSAT_2nd)
+            f.write(self.packed_SAT)
+            f.write(self.dir_stream)
+        finally:
+            if we_own_it:
+                f.close()
+
+
+# There are reports of large writes failing when writing to "network shares" on Windows.
+# MS says in KB899149 that it happens at 32KB less than 64MB.
+# This is said to be alleviated by using "w+b" mode instead of "wb".
+# One xlwt user has reported anomalous results at much smaller sizes,
+# so the stream is always written in 4 MB chunks.
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def piece_len(piece):
+    """
+    The length of a piece of a stream: bytes, or a ``(file, length)`` pair
+    whose first ``length`` bytes are the data.
+    """
+    if isinstance(piece, tuple):
+        return piece[1]
+    return len(piece)
+
+
+def write_piece(f, piece):
+    if isinstance(piece, tuple):
+        source, remaining = piece
+        source.seek(0)
+        while remaining > 0:
+            chunk = source.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise IOError("temporary row data file is shorter than expected")
+            f.write(chunk)
+            remaining -= len(chunk)
+        source.seek(0, 2) # to EOF, rows may still be flushed after the save
+        return
+    data = memoryview(piece)
+    for offset in xrange(0, len(data), CHUNK_SIZE):
+        f.write(data[offset:offset + CHUNK_SIZE])
@@ -1,14 +1,47 @@
 # -*- coding: windows-1252 -*-
 
+from array import array
 from decimal import Decimal
+from struct import pack_into, Struct
 from . import BIFFRecords
 from . import Style
 from .Cell import StrCell, BlankCell, NumberCell, FormulaCell, MulBlankCell, BooleanCell, ErrorCell, \
-    _get_cells_biff_data_mul
+    _rk_encode, error_code_map
 from . import ExcelFormula
 import datetime as dt
 from .Formatting import Font
-from .compat import basestring, xrange, int_types, iteritems
+from .compat import basestring, xrange, int_types
+
+
+# Kinds of the cells stored in the columns of a Row
+_STR = 0        # value is the SST index
+_BLANK = 1
+_NUMBER = 2     # value is the number
+_BOOLEAN = 3    # value is 0 or 1
+_ERROR = 4      # value is the error code
+_FORMULA = 5    # value is the index of the FormulaCell in the formula list of the row
+_MULBLANK = 6   # value is the last column of the blank range
+_COVERED = 7    # a column of a blank range, not written itself
+
+def _cell_key(colx, kind, xf_idx):
+    # The column is the most significant, sorting the keys sorts the cells by column
+    return colx << 16 | kind << 12 | xf_idx
+
+# Kinds of the values write_values stores without going through write
+_FAST_KINDS = {str: _STR, int: _NUMBER, float: _NUMBER}
+
+# Largest record written for one cell of the kinds above: NUMBER (4 + 14 bytes)
+_MAX_CELL_RECORD = 18
+
+# The records of the cells, with their record id and size
+_NUMBER_RECORD = Struct('<5Hd')
+_RK_RECORD = Struct('<5Hi')
+_LABELSST_RECORD = Struct('<5HL')
+_BLANK_RECORD = Struct('<5H')
+_BOOLERR_RECORD = Struct('<5H2B')
+_MUL_HEADER = Struct('<4H')  # MULRK and MULBLANK up to their first column
+_RK_CELL = Struct('<Hi')     # XF index and RK value of a MULRK column
+_LAST_COL = Struct('<H')
 
 
 class Row(object):
@@ -16,7 +49,10 @@ class Row(object):
                  "__idx",
                  "__parent",
                  "__parent_wb",
-                 "__cells",
+                 "__keys",
+                 "__values",
+                 "__formulas",
+                 "__in_order",
                  "__min_col_idx",
                  "__max_col_idx",
                  "__xf_index",
@@ -38,7 +74,13 @@ class Row(object):
         self.__idx = rowx
         self.__parent = parent_sheet
         self.__parent_wb = parent_sheet.get_parent()
-        self.__cells = {}
+        # The cells are stored in two parallel arrays instead of one object
+        # per cell: the n-th cell is __keys[n], holding its column, kind and
+        # XF index (see _cell_key), and __values[n]
+        self.__keys = array('L')
+        self.__values = array('d')
+        self.__formulas = None
+        self.__in_order = True
         self.__min_col_idx = 0
         self.__max_col_idx = 0
         self.__xf_index = 0x0F
@@ -118,7 +160,7 @@ class Row(object):
 
 
     def get_cells_count(self):
-        return len(self.__cells)
+        return len(self.__keys)
 
 
     def get_min_col(self):
@@ -146,29 +188,167 @@ class Row(object):
         return BIFFRecords.RowRecord(self.__idx, self.__min_col_idx,
             self.__max_col_idx, height_options, options).get()
 
+    def __insert(self, colx, kind, xf_idx, value):
+        keys = self.__keys
+        # While the columns are in order only a column not above the last one can exist already
+        if keys and (colx <= keys[-1] >> 16 or not self.__in_order):
+            for n, key in enumerate(keys):
+                if key >> 16 != colx:
+                    continue
+                if not self.__parent._cell_overwrite_ok:
+                    msg = "Attempt to overwrite cell: sheetname=%r rowx=%d colx=%d" \
+                        % (self.__parent.name, self.__idx, colx)
+                    raise Exception(msg)
+                if (key >> 12) & 0x0F == _STR:
+                    self.__parent_wb.del_str(int(self.__values[n]))
+                keys[n] = _cell_key(colx, kind, xf_idx)
+                self.__values[n] = value
+                return
+            self.__in_order = False
+        keys.append(_cell_key(colx, kind, xf_idx))
+        self.__values.append(value)
+
+    def __insert_formula(self, colx, xf_idx, cell_obj):
+        if self.__formulas is None:
+            self.__formulas = []
+        self.__formulas.append(cell_obj)
+        self.__insert(colx, _FORMULA, xf_idx, len(self.__formulas) - 1)
+
     def insert_cell(self, col_index, cell_obj):
-        if col_index in self.__cells:
-            if not self.__parent._cell_overwrite_ok:
-                msg = "Attempt to overwrite cell: sheetname=%r rowx=%d colx=%d" \
-                    % (self.__parent.name, self.__idx, col_index)
-                raise Exception(msg)
-            prev_cell_obj = self.__cells[col_index]
-            sst_idx = getattr(prev_cell_obj, 'sst_idx', None)
-            if sst_idx is not None:
-                self.__parent_wb.del_str(sst_idx)
-        self.__cells[col_index] = cell_obj
+        if cell_obj is None:
+            self.__insert(col_index, _COVERED, 0, 0)
+        elif isinstance(cell_obj, StrCell):
+            self.__insert(col_index, _STR, cell_obj.xf_idx, cell_obj.sst_idx)
+        elif isinstance(cell_obj, BlankCell):
+            self.__insert(col_index, _BLANK, cell_obj.xf_idx, 0)
+        elif isinstance(cell_obj, MulBlankCell):
+            self.__insert(col_index, _MULBLANK, cell_obj.xf_idx, cell_obj.colx2)
+        elif isinstance(cell_obj, NumberCell):
+            self.__insert(col_index, _NUMBER, cell_obj.xf_idx, cell_obj.number)
+        elif isinstance(cell_obj, BooleanCell):
+            self.__insert(col_index, _BOOLEAN, cell_obj.xf_idx, cell_obj.number)
+        elif isinstance(cell_obj, ErrorCell):
+            self.__insert(col_index, _ERROR, cell_obj.xf_idx, cell_obj.number)
+        else:
+            self.__insert_formula(col_index, cell_obj.xf_idx, cell_obj)
 
     def insert_mulcells(self, colx1, colx2, cell_obj):
         self.insert_cell(colx1, cell_obj)
         for col_index in xrange(colx1+1, colx2+1):
             self.insert_cell(col_index, None)
 
+    def __cell_order(self):
+        keys = self.__keys
+        if self.__in_order:
+            return xrange(len(keys))
+        return sorted(xrange(len(keys)), key=keys.__getitem__)
+
     def get_cells_biff_data(self):
-        cell_items = [item for item in iteritems(self.__cells) if item[1] is not None]
-        cell_items.sort() # in column order
-        return _get_cells_biff_data_mul(self.__idx, cell_items)
-        # previously:
-        # return ''.join([cell.get_biff_data() for colx, cell in cell_items])
+        # Return the BIFF data for all cell records in the row.
+        # Adjacent BLANK|RK records are combined into MUL(BLANK|RK) records.
+        # The records are packed straight from the cell arrays into one buffer.
+        rowx = self.__idx
+        keys = self.__keys
+        values = self.__values
+        order = self.__cell_order()
+        # Every cell takes at most _MAX_CELL_RECORD bytes, the columns of a
+        # MULBLANK have their own _COVERED cells, only formulas take more
+        size = len(keys) * _MAX_CELL_RECORD
+        formulas = {}
+        if self.__formulas:
+            for n in order:
+                if (keys[n] >> 12) & 0x0F == _FORMULA:
+                    formulas[n] = self.__formulas[int(values[n])].get_biff_data()
+                    size += len(formulas[n])
+        buf = bytearray(size)
+        pos = 0
+        nitems = len(order)
+        i = 0
+        while i < nitems:
+            n = order[i]
+            key = keys[n]
+            kind = (key >> 12) & 0x0F
+            icolx = key >> 16
+            if kind == _NUMBER:
+                rk = _rk_encode(values[n])
+                if rk is None:
+                    _NUMBER_RECORD.pack_into(buf, pos, 0x0203, 14, rowx, icolx, key & 0x0FFF, values[n])
+                    pos += 18
+                    i += 1
+                    continue
+                # the run of adjacent RK numbers, ended by any other cell
+                j = i + 1
+                lastcolx = icolx
+                runpos = pos + 8
+                while j < nitems:
+                    m = order[j]
+                    mkey = keys[m]
+                    if mkey >> 16 != lastcolx + 1 or (mkey >> 12) & 0x0F != _NUMBER:
+                        break
+                    mrk = _rk_encode(values[m])
+                    if mrk is None:
+                        break
+                    if j == i + 1:
+                        _RK_CELL.pack_into(buf, runpos, key & 0x0FFF, rk)
+                        runpos += 6
+                    _RK_CELL.pack_into(buf, runpos, mkey & 0x0FFF, mrk)
+                    runpos += 6
+                    lastcolx += 1
+                    j += 1
+                if j == i + 1:
+                    # RK record
+                    _RK_RECORD.pack_into(buf, pos, 0x027E, 10, rowx, icolx, key & 0x0FFF, rk)
+                    pos += 14
+                else:
+                    # MULRK record
+                    nc = j - i
+                    _MUL_HEADER.pack_into(buf, pos, 0x00BD, 6 * nc + 6, rowx, icolx)
+                    _LAST_COL.pack_into(buf, runpos, lastcolx)
+                    pos = runpos + 2
+                i = j
+            elif kind == _STR:
+                _LABELSST_RECORD.pack_into(buf, pos, 0x00FD, 10, rowx, icolx, key & 0x0FFF, int(values[n]))
+                pos += 14
+                i += 1
+            elif kind == _BLANK:
+                # the run of adjacent blanks
+                j = i + 1
+                while j < nitems and keys[order[j]] >> 16 == icolx + j - i and (keys[order[j]] >> 12) & 0x0F == _BLANK:
+                    j += 1
+                if j == i + 1:
+                    # BLANK record
+                    _BLANK_RECORD.pack_into(buf, pos, 0x0201, 6, rowx, icolx, key & 0x0FFF)
+                    pos += 10
+                else:
+                    # MULBLANK record
+                    nc = j - i
+                    _MUL_HEADER.pack_into(buf, pos, 0x00BE, 2 * nc + 6, rowx, icolx)
+                    pos += 8
+                    for k in xrange(i, j):
+                        _LAST_COL.pack_into(buf, pos, keys[order[k]] & 0x0FFF)
+                        pos += 2
+                    _LAST_COL.pack_into(buf, pos, icolx + nc - 1)
+                    pos += 2
+                i = j
+            else:
+                if kind == _BOOLEAN or kind == _ERROR:
+                    _BOOLERR_RECORD.pack_into(buf, pos, 0x0205, 8, rowx, icolx, key & 0x0FFF, int(values[n]), kind == _ERROR)
+                    pos += 12
+                elif kind == _MULBLANK:
+                    lastcolx = int(values[n])
+                    nc = lastcolx - icolx + 1
+                    _MUL_HEADER.pack_into(buf, pos, 0x00BE, 2 * nc + 6, rowx, icolx)
+                    pos += 8
+                    pack_into('<%dH' % nc, buf, pos, *([key & 0x0FFF] * nc))
+                    pos += 2 * nc
+                    _LAST_COL.pack_into(buf, pos, lastcolx)
+                    pos += 2
+                elif kind == _FORMULA:
+                    data = formulas[n]
+                    buf[pos:pos + len(data)] = data
+                    pos += len(data)
+                i += 1
+        return bytes(buf[:pos])
 
     def get_index(self):
         return self.__idx
@@ -177,13 +357,13 @@ class Row(object):
         self.__adjust_height(style)
         self.__adjust_bound_col_idx(colx)
         xf_index = self.__parent_wb.add_style(style)
-        self.insert_cell(colx, StrCell(self.__idx, colx, xf_index, self.__parent_wb.add_str(value)))
+        self.__insert(colx, _STR, xf_index, self.__parent_wb.add_str(value))
 
     def set_cell_blank(self, colx, style=Style.default_style):
         self.__adjust_height(style)
         self.__adjust_bound_col_idx(colx)
         xf_index = self.__parent_wb.add_style(style)
-        self.insert_cell(colx, BlankCell(self.__idx, colx, xf_index))
+        self.__insert(colx, _BLANK, xf_index, 0)
 
     def set_cell_mulblanks(self, first_colx, last_colx, style=Style.default_style):
         assert 0 <= first_colx <= last_colx <= 255
@@ -191,39 +371,44 @@ class Row(object):
         self.__adjust_bound_col_idx(first_colx, last_colx)
         xf_index = self.__parent_wb.add_style(style)
         # ncols = last_colx - first_colx + 1
-        self.insert_mulcells(first_colx, last_colx, MulBlankCell(self.__idx, first_colx, last_colx, xf_index))
+        self.__insert(first_colx, _MULBLANK, xf_index, last_colx)
+        for colx in xrange(first_colx+1, last_colx+1):
+            self.__insert(colx, _COVERED, 0, 0)
 
     def set_cell_number(self, colx, number, style=Style.default_style):
         self.__adjust_height(style)
         self.__adjust_bound_col_idx(colx)
         xf_index = self.__parent_wb.add_style(style)
-        self.insert_cell(colx, NumberCell(self.__idx, colx, xf_index, number))
+        self.__insert(colx, _NUMBER, xf_index, float(number))
 
     def set_cell_date(self, colx, datetime_obj, style=Style.default_style):
         self.__adjust_height(style)
         self.__adjust_bound_col_idx(colx)
         xf_index = self.__parent_wb.add_style(style)
-        self.insert_cell(colx,
-            NumberCell(self.__idx, colx, xf_index, self.__excel_date_dt(datetime_obj)))
+        self.__insert(colx, _NUMBER, xf_index, self.__excel_date_dt(datetime_obj))
 
     def set_cell_formula(self, colx, formula, style=Style.default_style, calc_flags=0):
         self.__adjust_height(style)
         self.__adjust_bound_col_idx(colx)
         xf_index = self.__parent_wb.add_style(style)
         self.__parent_wb.add_sheet_reference(formula)
-        self.insert_cell(colx, FormulaCell(self.__idx, colx, xf_index, formula, calc_flags=0))
+        self.__insert_formula(colx, xf_index, FormulaCell(self.__idx, colx, xf_index, formula, calc_flags=0))
 
     def set_cell_boolean(self, colx, value, style=Style.default_style):
         self.__adjust_height(style)
         self.__adjust_bound_col_idx(colx)
         xf_index = self.__parent_wb.add_style(style)
-        self.insert_cell(colx, BooleanCell(self.__idx, colx, xf_index, bool(value)))
+        self.__insert(colx, _BOOLEAN, xf_index, bool(value))
 
     def set_cell_error(self, colx, error_string_or_code, style=Style.default_style):
         self.__adjust_height(style)
         self.__adjust_bound_col_idx(colx)
         xf_index = self.__parent_wb.add_style(style)
-        self.insert_cell(colx, ErrorCell(self.__idx, colx, xf_index, error_string_or_code))
+        try:
+            code = error_code_map[error_string_or_code]
+        except KeyError:
+            raise Exception('Illegal error value (%r)' % error_string_or_code)
+        self.__insert(colx, _ERROR, xf_index, code)
 
     def write(self, col, label, style=Style.default_style):
         self.__adjust_height(style)
@@ -231,28 +416,78 @@ class Row(object):
         style_index = self.__parent_wb.add_style(style)
         if isinstance(label, basestring):
             if len(label) > 0:
-                self.insert_cell(col,
-                    StrCell(self.__idx, col, style_index, self.__parent_wb.add_str(label))
-                    )
+                self.__insert(col, _STR, style_index, self.__parent_wb.add_str(label))
             else:
-                self.insert_cell(col, BlankCell(self.__idx, col, style_index))
+                self.__insert(col, _BLANK, style_index, 0)
         elif isinstance(label, bool): # bool is subclass of int; test bool first
-            self.insert_cell(col, BooleanCell(self.__idx, col, style_index, label))
+            self.__insert(col, _BOOLEAN, style_index, label)
         elif isinstance(label, int_types+(float, Decimal)):
-            self.insert_cell(col, NumberCell(self.__idx, col, style_index, label))
+            self.__insert(col, _NUMBER, style_index, float(label))
         elif isinstance(label, (dt.datetime, dt.date, dt.time)):
             date_number = self.__excel_date_dt(label)
-            self.insert_cell(col, NumberCell(self.__idx, col, style_index, date_number))
+            self.__insert(col, _NUMBER, style_index, date_number)
         elif label is None:
-            self.insert_cell(col, BlankCell(self.__idx, col, style_index))
+            self.__insert(col, _BLANK, style_index, 0)
         elif isinstance(label, ExcelFormula.Formula):
             self.__parent_wb.add_sheet_reference(label)
-            self.insert_cell(col, FormulaCell(self.__idx, col, style_index, label))
+            self.__insert_formula(col, style_index, FormulaCell(self.__idx, col, style_index, label))
         elif isinstance(label, (list, tuple)):
             self.__rich_text_helper(col, label, style, style_index)
         else:
             raise Exception("Unexpected data type %r" % type(label))
 
+    def write_values(self, first_col, values, style=Style.default_style):
+        """
+        Write a sequence of values to the cells starting at first_col, each
+        value like :meth:`write` does. The style and the column bounds are
+        resolved once for the sequence, and strings and numbers are stored
+        directly; only the other types go through :meth:`write`.
+        """
+        if not isinstance(values, (list, tuple)):
+            values = list(values)
+        if not values:
+            return
+        self.__adjust_height(style)
+        self.__adjust_bound_col_idx(first_col, first_col + len(values) - 1)
+        style_index = self.__parent_wb.add_style(style)
+        add_str = self.__parent_wb.add_str
+        fast_kinds = _FAST_KINDS
+        keys = self.__keys
+        if not (self.__in_order and (not keys or first_col > keys[-1] >> 16)):
+            # Some cells may exist already, insert the values one by one
+            insert = self.__insert
+            for col, label in enumerate(values, first_col):
+                kind = fast_kinds.get(type(label))
+                if kind == _NUMBER:
+                    insert(col, _NUMBER, style_index, label)
+                elif kind == _STR and label:
+                    insert(col, _STR, style_index, add_str(label))
+                else:
+                    self.write(col, label, style)
+            return
+
+        # All the cells are new and follow the existing ones, append them in bulk
+        number_key = _cell_key(0, _NUMBER, style_index)
+        str_key = _cell_key(0, _STR, style_index)
+        new_keys = []
+        new_values = []
+        for col, label in enumerate(values, first_col):
+            kind = fast_kinds.get(type(label))
+            if kind == _NUMBER:
+                new_keys.append(col << 16 | number_key)
+                new_values.append(label)
+            elif kind == _STR and label:
+                new_keys.append(col << 16 | str_key)
+                new_values.append(add_str(label))
+            else:
+                keys.extend(new_keys)
+                self.__values.extend(new_values)
+                new_keys = []
+                new_values = []
+                self.write(col, label, style)
+        keys.extend(new_keys)
+        self.__values.extend(new_values)
+
     def set_cell_rich_text(self, col, rich_text_list, style=Style.default_style):
         self.__adjust_height(style)
         self.__adjust_bound_col_idx(col)
@@ -281,9 +516,9 @@ class Row(object):
                 if default_font is None:
                     default_font = self.__parent_wb.add_font(style.font)
         if rt:
-            self.insert_cell(col, StrCell(self.__idx, col, style_index, self.__parent_wb.add_rt(rt)))
+            self.__insert(col, _STR, style_index, self.__parent_wb.add_rt(rt))
         else:
-            self.insert_cell(col, BlankCell(self.__idx, col, style_index))
+            self.__insert(col, _BLANK, style_index, 0)
 
     write_blanks = set_cell_mulblanks
     write_rich_text = set_cell_rich_text
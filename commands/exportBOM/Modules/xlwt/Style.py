@@ -1,12 +1,18 @@
 from __future__ import print_function
 # -*- coding: windows-1252 -*-
 
+import copy
+import functools
+
 from . import Formatting
 from .BIFFRecords import NumberFormatRecord, XFRecord, StyleRecord
 from .compat import basestring, xrange
 
 FIRST_USER_DEFINED_NUM_FORMAT_IDX = 164
 
+# Number of distinct easyxf calls whose styles are kept
+EASYXF_CACHE_SIZE = 1024
+
 class XFStyle(object):
 
     def __init__(self):
@@ -83,6 +89,10 @@ class StyleCollection(object):
         for fmtidx, fmtstr in zip(range(37, 50), StyleCollection._std_num_fmt_list[23:]):
             self._num_formats[fmtstr] = fmtidx
 
+        # (num_format_str, font, alignment, borders, pattern, protection)
+        # -> (xf, xf_index) of the styles added so far
+        self._style_xf = {}
+
         self.default_style = XFStyle()
         self._default_xf = self._add_style(self.default_style)[0]
 
@@ -92,6 +102,14 @@ class StyleCollection(object):
         return self._add_style(style)[1]
 
     def _add_style(self, style):
+        style_key = (style.num_format_str, style.font, style.alignment,
+                     style.borders, style.pattern, style.protection)
+        added = self._style_xf.get(style_key)
+        if added is not None:
+            self.stats[0] += 1
+            self.stats[3] += 1
+            return added
+
         num_format_str = style.num_format_str
         if num_format_str in self._num_formats:
             num_format_idx = self._num_formats[num_format_str]
@@ -150,6 +168,7 @@ class StyleCollection(object):
             # 12 bits allowed, 0xFFF is a sentinel value
             raise ValueError("More than 4094 XFs (styles)")
 
+        self._style_xf[style_key] = xf, xf_index
         return xf, xf_index
         
     def add_font(self, font):
@@ -722,16 +741,64 @@ def easyxf(strg_to_parse="", num_format_str=None,
 
       Examples: ``"#,##0.00"``, ``"dd/mm/yyyy"``
 
-    :return: An :class:`XFstyle` object.
+    :return: An :class:`XFstyle` object. The calls with the same arguments
+      return the same object, it can't be changed: use :func:`copy.deepcopy`
+      to get a style which can.
 
     """
+    return _cached_easyxf(strg_to_parse, num_format_str,
+        field_sep, line_sep, intro_sep, esc_char, debug)
+
+@functools.lru_cache(maxsize=EASYXF_CACHE_SIZE)
+def _cached_easyxf(strg_to_parse, num_format_str,
+                   field_sep, line_sep, intro_sep, esc_char, debug):
     xfobj = XFStyle()
     if num_format_str is not None:
         xfobj.num_format_str = num_format_str
     if strg_to_parse:
         _parse_strg_to_obj(strg_to_parse, xfobj, xf_dict,
             field_sep=field_sep, line_sep=line_sep, intro_sep=intro_sep, esc_char=esc_char, debug=debug)
-    return xfobj
+    for section in ('font', 'alignment', 'borders', 'pattern', 'protection'):
+        _make_read_only(getattr(xfobj, section))
+    return _make_read_only(xfobj)
+
+class _ReadOnly(object):
+    # Base of the classes of the shared easyxf styles, their copies are
+    # instances of the original class again. The private attributes are
+    # still set, like the font weight computed when the record is written.
+    _writable_class = None
+
+    def __setattr__(self, name, value):
+        if not name.startswith('_'):
+            raise AttributeError("can't set %s of a style returned by easyxf(), change a copy.deepcopy() of it" % name)
+        super(_ReadOnly, self).__setattr__(name, value)
+
+    def __delattr__(self, name):
+        if not name.startswith('_'):
+            raise AttributeError("can't delete %s of a style returned by easyxf(), change a copy.deepcopy() of it" % name)
+        super(_ReadOnly, self).__delattr__(name)
+
+    def __copy__(self):
+        obj = self._writable_class.__new__(self._writable_class)
+        obj.__dict__.update(self.__dict__)
+        return obj
+
+    def __deepcopy__(self, memo):
+        obj = self._writable_class.__new__(self._writable_class)
+        memo[id(self)] = obj
+        obj.__dict__.update(copy.deepcopy(self.__dict__, memo))
+        return obj
+
+_read_only_classes = {}
+
+def _make_read_only(obj):
+    cls = type(obj)
+    read_only_class = _read_only_classes.get(cls)
+    if read_only_class is None:
+        read_only_class = type('ReadOnly' + cls.__name__, (_ReadOnly, cls), {'_writable_class': cls})
+        _read_only_classes[cls] = read_only_class
+    obj.__class__ = read_only_class
+    return obj
 
 def easyfont(strg_to_parse="", field_sep=",", esc_char="\\", debug=False):
     xfobj = XFStyle()
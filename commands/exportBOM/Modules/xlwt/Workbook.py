@@ -38,7 +38,10 @@
 #       ExtSST
 #       EOF
 
+import io
+
 from . import BIFFRecords
+from . import CompoundDoc
 from . import Style
 from .compat import unicode_type, int_types, basestring
 
@@ -52,8 +55,11 @@ class Workbook(object):
     #################################################################
     ## Constructor
     #################################################################
-    def __init__(self, encoding='ascii', style_compression=0):
+    def __init__(self, encoding='ascii', style_compression=0, flush_rows=0):
         self.encoding = encoding
+        # Rows each sheet keeps in memory before flushing the completed ones,
+        # 0 keeps every row in memory until the workbook is saved
+        self.flush_rows = flush_rows
         self.__owner = 'None'
         self.__country_code = None # 0x07 is Russia :-)
         self.__wnd_protect = 0
@@ -636,11 +642,13 @@ class Workbook(object):
         return self.__sst.get_biff_record()
 
     def __ext_sst_rec(self, abs_stream_pos):
-        return b''
-        #return BIFFRecords.ExtSSTRecord(abs_stream_pos, self.sst_record.str_placement,
-        #self.sst_record.portions_len).get()
+        return self.__sst.get_ext_sst_record(abs_stream_pos)
 
-    def get_biff_data(self):
+    def get_biff_pieces(self):
+        """
+        The BIFF data of the workbook as a list of pieces, see
+        :meth:`~xlwt.Worksheet.Worksheet.get_biff_pieces`.
+        """
         before = b''
         before += self.__bof_rec()
         before += self.__intf_hdr_rec()
@@ -678,19 +686,25 @@ class Workbook(object):
         eof = self.__eof_rec()
 
         self.__worksheets[self.__active_sheet].selected = True
-        sheets = b''
+        sheets = []
         sheet_biff_lens = []
         for sheet in self.__worksheets:
-            data = sheet.get_biff_data()
-            sheets += data
-            sheet_biff_lens.append(len(data))
+            pieces = sheet.get_biff_pieces()
+            sheets.extend(pieces)
+            sheet_biff_lens.append(sum(CompoundDoc.piece_len(piece) for piece in pieces))
 
         bundlesheets = self.__boundsheets_rec(len(before), len(after)+len(ext_sst)+len(eof), sheet_biff_lens)
 
         sst_stream_pos = len(before) + len(bundlesheets) + len(country)  + len(all_links)
         ext_sst = self.__ext_sst_rec(sst_stream_pos)
 
-        return before + bundlesheets + after + ext_sst + eof + sheets
+        return [before + bundlesheets + after + ext_sst + eof] + sheets
+
+    def get_biff_data(self):
+        stream = io.BytesIO()
+        for piece in self.get_biff_pieces():
+            CompoundDoc.write_piece(stream, piece)
+        return stream.getvalue()
 
     def save(self, filename_or_stream):
         """
@@ -703,10 +717,11 @@ class Workbook(object):
           provided. It can also be a stream object with a write method, such as
           a :class:`~io.StringIO`, in which case the data for the excel
           file is written to the stream.
-        """
-        from . import CompoundDoc
 
+        The sheets are written piece by piece, so the rows flushed to the
+        temporary files of the sheets are never held in memory together.
+        """
         doc = CompoundDoc.XlsDoc()
-        doc.save(filename_or_stream, self.get_biff_data())
+        doc.save_pieces(filename_or_stream, self.get_biff_pieces())
 
 
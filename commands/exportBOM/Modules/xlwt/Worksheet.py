@@ -200,6 +200,10 @@ class Worksheet(object):
         self.last_used_col = 0
         self.first_used_col = 255
         self.row_tempfile = None
+        self.row_tempfile_len = 0
+        # Rows kept in memory before the rows below the next new row are
+        # flushed to row_tempfile, 0 keeps every row in memory
+        self.flush_rows = parent_book.flush_rows
         self.__flushed_rows = {}
         self.__row_visible_levels = 0
 
@@ -1087,6 +1091,62 @@ class Worksheet(object):
         """
         self.row(r).write(c, label, style)
 
+    def write_rows(self, r, c, rows, style=Style.default_style):
+        """
+        This method is used to write a block of cells row by row, much
+        faster than calling :meth:`write` for every cell.
+
+        :param r:
+
+           The zero-relative number of the row of the first sequence.
+
+        :param c:
+
+           The zero-relative number of the column of the first value of
+           every sequence.
+
+        :param rows:
+
+           An iterable of sequences, one per row. The values are converted
+           like the ``label`` of :meth:`write`. Adjacent numbers and blanks
+           are saved as MULRK and MULBLANK records.
+
+        :param style:
+
+           The style of all the cells, see :meth:`write`.
+        """
+        for rowx, values in enumerate(rows, r):
+            self.row(rowx).write_values(c, values, style)
+
+    def write_cols(self, r, c, cols, style=Style.default_style):
+        """
+        This method is used to write a block of cells column by column, see
+        :meth:`write_rows`.
+
+        :param cols:
+
+           An iterable of sequences, one per column starting at column
+           ``c``, whose first values are written to row ``r``. The columns
+           may have different lengths.
+        """
+        cols = [col if isinstance(col, (list, tuple)) else list(col) for col in cols]
+        nrows = max([len(col) for col in cols] or [0])
+        for i in range(nrows):
+            row = self.row(r + i)
+            # The values present in this row, written as runs of adjacent columns
+            first = c
+            values = []
+            for colx, col in enumerate(cols, c):
+                if i < len(col):
+                    if not values:
+                        first = colx
+                    values.append(col[i])
+                elif values:
+                    row.write_values(first, values, style)
+                    values = []
+            if values:
+                row.write_values(first, values, style)
+
     def write_rich_text(self, r, c, rich_text_list, style=Style.default_style):
         self.row(r).set_cell_rich_text(c, rich_text_list, style)
 
@@ -1139,6 +1199,8 @@ class Worksheet(object):
         if indx not in self.__rows:
             if indx in self.__flushed_rows:
                 raise Exception("Attempt to reuse row index %d of sheet %r after flushing" % (indx, self.__name))
+            if self.flush_rows and len(self.__rows) >= self.flush_rows:
+                self.flush_row_data(indx)
             self.__rows[indx] = self.Row(indx, self)
             if indx > self.last_used_row:
                 self.last_used_row = indx
@@ -1305,9 +1367,9 @@ class Worksheet(object):
 
         return result
 
-    def __row_blocks_rec(self):
+    def __row_blocks_rec(self, rows=None):
         result = []
-        for row in itervalues(self.__rows):
+        for row in (itervalues(self.__rows) if rows is None else rows):
             result.append(row.get_row_biff_data())
             result.append(row.get_cells_biff_data())
         return b''.join(result)
@@ -1377,8 +1439,14 @@ class Worksheet(object):
         result += BIFFRecords.PasswordRecord(self.__password).get()
         return result
 
-    def get_biff_data(self):
-        result = [
+    def get_biff_pieces(self):
+        """
+        The BIFF data of the sheet as a list of pieces, either bytes or a
+        ``(file, length)`` pair for the rows flushed to :attr:`row_tempfile`.
+        The pieces are written in order by :meth:`~xlwt.Workbook.Workbook.save`
+        without joining them in memory.
+        """
+        result = [b''.join([
             self.__bof_rec(),
             self.__calc_settings_rec(),
             self.__guts_rec(),
@@ -1388,33 +1456,55 @@ class Worksheet(object):
             self.__dimensions_rec(),
             self.__print_settings_rec(),
             self.__protection_rec(),
-            ]
+            ])]
         if self.row_tempfile:
             self.row_tempfile.flush()
-            self.row_tempfile.seek(0)
-            result.append(self.row_tempfile.read())
-            self.row_tempfile.seek(0, 2) # to EOF
-            # Above seek() is necessary to avoid a spurious IOError
-            # with Errno 0 if the caller continues on writing rows
-            # and flushing row data after the save().
-            # See https://bugs.python.org/issue3207
-        result.extend([
+            result.append((self.row_tempfile, self.row_tempfile_len))
+        result.append(b''.join([
             self.__row_blocks_rec(),
             self.__merged_rec(),
             self.__bitmaps_rec(),
             self.__window2_rec(),
             self.__panes_rec(),
             self.__eof_rec(),
-            ])
+            ]))
+        return result
+
+    def get_biff_data(self):
+        result = []
+        for piece in self.get_biff_pieces():
+            if isinstance(piece, tuple):
+                f = piece[0]
+                f.seek(0)
+                piece = f.read()
+                f.seek(0, 2) # to EOF
+                # Above seek() is necessary to avoid a spurious IOError
+                # with Errno 0 if the caller continues on writing rows
+                # and flushing row data after the save().
+                # See https://bugs.python.org/issue3207
+            result.append(piece)
         return b''.join(result)
 
-    def flush_row_data(self):
+    def flush_row_data(self, below=None):
+        """
+        Write the row blocks kept in memory to :attr:`row_tempfile` and drop
+        the rows. Flushed rows can't be written to again.
+
+        :param below:
+          Only flush the rows whose index is lower than this one.
+        """
         if self.row_tempfile is None:
             self.row_tempfile = tempfile.TemporaryFile()
-        self.row_tempfile.write(self.__row_blocks_rec())
-        for rowx in self.__rows:
+        if below is None:
+            rows = self.__rows
+            self.__rows = {}
+        else:
+            rows = dict((rowx, row) for rowx, row in self.__rows.items() if rowx < below)
+            self.__rows = dict((rowx, row) for rowx, row in self.__rows.items() if rowx >= below)
+        data = self.__row_blocks_rec(itervalues(rows))
+        self.row_tempfile.write(data)
+        self.row_tempfile_len += len(data)
+        for rowx in rows:
             self.__flushed_rows[rowx] = 1
-        self.__update_row_visible_levels()
-        self.__rows = {}
-
-
+        temp = max([row.level for row in itervalues(rows)] or [-1]) + 1
+        self.__row_visible_levels = max(temp, self.__row_visible_levels)
@@ -1,13 +1,13 @@
-from openpyxl import Workbook
 import adsk.core, adsk.fusion, adsk.cam, traceback
 import os
 import sys
 sys.path.append("/usr/local/lib/python3.9/site-packages")
-from .Modules import xlrd
-from .Modules import xlwt
 
 from ...lib import fusion360utils as futil
 from ... import config
+from ..buildPedestal import plan
+from ..buildPedestal import state as pedestalState
+from .. import export_worker
 app = adsk.core.Application.get()
 ui = app.userInterface
 
@@ -30,9 +30,8 @@ COMMAND_BESIDE_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_Drawing'
 # Resource location for command icons, here we assume a sub folder in this directory named "resources".
 ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
 
-# Local list of event handlers used to maintain a reference so
-# they are not released and garbage collected.
-local_handlers = []
+# Rows of a BOM sheet kept in memory, the completed rows are spooled to a temporary file
+BOM_FLUSH_ROWS = 256
 
 # Executed when add-in is run.
 def start():
@@ -100,7 +99,7 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
         
 
         # Connect to the events that are need by this command.
-        futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+        futil.add_handler(args.command.execute, command_execute, command=args.command)
 
     except:
         if ui:
@@ -110,45 +109,44 @@ def command_execute(args: adsk.core.CommandEventArgs):
     try:
         eventArgs = adsk.core.CommandEventArgs.cast(args)
 
-        if config.IS_DCBASE_GENERATE:
-            generate_BOM(config.BASE_LENGTH, config.BASE_DEPTH, config.BASE_HEIGHT, config.BOM_FILE)
+        # Export every pedestal of the active design from its stored parameters
+        design = adsk.fusion.Design.cast(app.activeProduct)
+        pedestals = pedestalState.index.pedestals(design) if design else []
+        if pedestals:
+            load_libraries()
+            # The files are written in the background
+            for pedestal, filename in pedestalState.export_names(pedestals, config.BOM_FILE):
+                export_worker.submit(os.path.basename(filename), write_BOM, pedestal.length, pedestal.depth, pedestal.height, filename)
         else:
             ui.messageBox("The DeepClaw Base Model Haven't Generated!")
     except:
         if ui:
             ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
+@futil.timed_function()
 def generate_BOM(length, depth, height, filename):
     try:
-        workbook = xlwt.Workbook(encoding='ascii') # create a new workbook
-        worksheet = workbook.add_sheet("BOM")
-
-        # Write Input
-        worksheet.write(0,0, "Component")
-        worksheet.write(0,1, "Quantity")
-        aluExtL = "LCF8-8080-" + str(int(length*10))
-        aluExtD = "LCF8-8080-" + str(int(depth*10))
-        aluExtH = "LCF8-8080-" + str(int(height*10))
-        worksheet.write(1, 0, aluExtL)
-        worksheet.write(1, 1, "2")
-        worksheet.write(2, 0, aluExtD)
-        worksheet.write(2, 1, "2")
-        worksheet.write(3, 0, aluExtH)
-        worksheet.write(3, 1, "4")
-
-        worksheet.write(4, 0, "ASSF-CAP-LCE8_8080") # cap
-        worksheet.write(4, 1, "4")
-        worksheet.write(5, 0, "LBSB8-8080") # Cast Bracket
-        worksheet.write(5, 1, "8")
-        worksheet.write(6, 0, "ASSF-CONN-E8080") # Connecting Plate
-        worksheet.write(6, 1, "4")
-        worksheet.write(7, 0, "GD-60-F") # Wheel
-        worksheet.write(7, 1, "4")
-        worksheet.write(8, 0, "ASSF-RFP-UR5_AUBOi5_FrankEmika") # Robot Mounting Plate
-        worksheet.write(8, 1, "1")
-
-        workbook.save(filename)
-
+        write_BOM(length, depth, height, filename)
     except:
         if ui:
-            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
\ No newline at end of file
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+def write_BOM(length, depth, height, filename):
+    "Write the BOM file, doesn't use the Fusion 360 API so it can run on a worker thread"
+    write_plan_BOM(plan.plan_pedestal(depth, length, height), filename)
+
+def load_libraries():
+    "xlwt is loaded by the first export instead of when the add-in starts"
+    return futil.timed_import('.Modules.xlwt', __package__)
+
+@futil.timed_function()
+def write_plan_BOM(pedestalPlan, filename):
+    "Write the BOM lines of a pedestal plan"
+    xlwt = load_libraries()
+    workbook = xlwt.Workbook(encoding='ascii', flush_rows=BOM_FLUSH_ROWS) # create a new workbook
+    worksheet = workbook.add_sheet("BOM")
+
+    # Write Input
+    worksheet.write_rows(0, 0, [("Component", "Quantity")] + [(line.part, str(line.quantity)) for line in pedestalPlan.bom])
+
+    workbook.save(filename)
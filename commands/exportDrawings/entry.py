@@ -9,13 +9,14 @@ sys.path.append("/usr/local/lib/python3.9/site-packages")
 # from .Modules.reportlab.pdfgen import canvas
 # from .Modules.reportlab.lib.pagesizes import A3, landscape
 
-from PyPDF2 import PdfFileWriter, PdfFileReader
+# PyPDF2 and reportlab are loaded by the first export, see load_libraries
 import io
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A3, landscape
+import threading
 
 from ...lib import fusion360utils as futil
 from ... import config
+from ..buildPedestal import state as pedestalState
+from .. import export_worker
 app = adsk.core.Application.get()
 ui = app.userInterface
 
@@ -38,10 +39,6 @@ COMMAND_BESIDE_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_Pedestal'
 # Resource location for command icons, here we assume a sub folder in this directory named "resources".
 ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
 
-# Local list of event handlers used to maintain a reference so
-# they are not released and garbage collected.
-local_handlers = []
-
 # Executed when add-in is run.
 def start():
     try:
@@ -108,7 +105,7 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
         
 
         # Connect to the events that are need by this command.
-        futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+        futil.add_handler(args.command.execute, command_execute, command=args.command)
 
     except:
         if ui:
@@ -118,53 +115,83 @@ def command_execute(args: adsk.core.CommandEventArgs):
     try:
         eventArgs = adsk.core.CommandEventArgs.cast(args)
 
-        if config.IS_DCBASE_GENERATE:
-            generate_drawing(config.BASE_LENGTH, config.BASE_DEPTH, config.BASE_HEIGHT, config.DRAWING_NAME)
+        # Export every pedestal of the active design from its stored parameters
+        design = adsk.fusion.Design.cast(app.activeProduct)
+        pedestals = pedestalState.index.pedestals(design) if design else []
+        if pedestals:
+            load_libraries()
+            # The files are written in the background
+            for pedestal, filename in pedestalState.export_names(pedestals, config.DRAWING_NAME):
+                export_worker.submit(os.path.basename(filename), write_drawing, pedestal.length, pedestal.depth, pedestal.height, filename)
         else:
             ui.messageBox("The DeepClaw Base Model Haven't Generated!")
     except:
         if ui:
             ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
+@futil.timed_function()
 def generate_drawing(length, depth, height, filename):
     try:
-        packet = io.BytesIO()
-        can = canvas.Canvas(packet, pagesize=landscape(A3))
-        width, height = A3
+        write_drawing(length, depth, height, filename)
+    except:
+        if ui:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+# reportlab keeps module-level state while drawing, so only one canvas is drawn at a time
+_canvas_lock = threading.Lock()
+
+# The drawing template, parsed once per session and reloaded when the file changes
+TEMPLATE_FILE = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'Drawing.pdf')
+templateCache = None
+
+# PyPDF2 and reportlab, loaded by load_libraries
+_libraries = {}
+_libraries_lock = threading.Lock()
+
+def load_libraries():
+    """Load PyPDF2 and reportlab on the first export instead of when the add-in starts.
+
+    The export commands call it on the UI thread before handing the files to
+    the worker pool, write_drawing calls it for the other callers.
+    """
+    global templateCache
+    with _libraries_lock:
+        if not _libraries:
+            _libraries['PyPDF2'] = futil.timed_import('PyPDF2')
+            _libraries['canvas'] = futil.timed_import('reportlab.pdfgen.canvas')
+            _libraries['pagesizes'] = futil.timed_import('reportlab.lib.pagesizes')
+            templateCache = futil.timed_import('.template_cache', __package__).TemplateCache()
+    return _libraries
+
+@futil.timed_function()
+def write_drawing(length, depth, height, filename):
+    "Write the drawing file, doesn't use the Fusion 360 API so it can run on a worker thread"
+    libraries = load_libraries()
+    PyPDF2, canvas, pagesizes = libraries['PyPDF2'], libraries['canvas'], libraries['pagesizes']
+    packet = io.BytesIO()
+    with _canvas_lock:
+        can = canvas.Canvas(packet, pagesize=pagesizes.landscape(pagesizes.A3))
         # can.drawString(900, 660, "Length = xxx mm")
         # can.drawString(900, 630, "Width = xxx mm")
         # can.drawString(900, 600, "Height = xxx mm")
-        lString = "Length = " + str(config.BASE_LENGTH*10) + " mm"
-        dString = "Width = " + str(config.BASE_DEPTH*10) + " mm"
-        hString = "Height = " + str(config.BASE_HEIGHT*10) + " mm"
+        lString = "Length = " + str(length*10) + " mm"
+        dString = "Width = " + str(depth*10) + " mm"
+        hString = "Height = " + str(height*10) + " mm"
         can.drawString(900, 660, lString)
         can.drawString(900, 630, dString)
         can.drawString(900, 600, hString)
         can.save()
 
-        #move to the beginning of the StringIO buffer
-        packet.seek(0)
-
-        # create a new PDF with Reportlab
-        new_pdf = PdfFileReader(packet)
-        # read your existing PDF
-        fileName = os.path.join(os.path.abspath(os.path.dirname(__file__)), './Drawing.pdf')
-        # existing_pdf = PdfFileReader(open("./DCBase_Drawing.pdf", "rb"), strict=False) # The default size of the drawing is A3
-        existing_pdf = PdfFileReader(open(fileName, "rb"), strict=False)
-        output = PdfFileWriter()
-        # add the "watermark" (which is the new pdf) on the existing page
-        page = existing_pdf.getPage(0)
-        page.mergePage(new_pdf.getPage(0))
-        output.addPage(page)
-        # finally, write "output" to a real file
-        outputStream = open(filename, "wb")
+    #move to the beginning of the StringIO buffer
+    packet.seek(0)
+
+    # create a new PDF with Reportlab
+    new_pdf = PyPDF2.PdfFileReader(packet)
+    output = PyPDF2.PdfFileWriter()
+    # add the "watermark" (which is the new pdf) on a clone of the cached template page
+    # existing_pdf = PdfFileReader(open("./DCBase_Drawing.pdf", "rb"), strict=False) # The default size of the drawing is A3
+    page = templateCache.get(TEMPLATE_FILE).stamped_page(new_pdf.getPage(0))
+    output.addPage(page)
+    # finally, write "output" to a real file
+    with open(filename, "wb") as outputStream:
         output.write(outputStream)
-        outputStream.close()
-    except:
-        if ui:
-            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
-
-
-            
-
-
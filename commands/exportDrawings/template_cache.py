@@ -0,0 +1,173 @@
+# Process-lifetime cache of the parsed drawing template.
+#
+# The template page is read once: every object it references is resolved,
+# and its content stream is decoded, wrapped in a q/Q graphics state pair and
+# compressed once. Each export gets a clone of the page, so the writer never
+# touches the file and never modifies the cached objects. The cache is
+# reloaded when the mtime or the size of the template file changes.
+
+import copy
+import io
+import os
+import threading
+
+from PyPDF2 import PdfFileReader
+from PyPDF2.pdf import PageObject, ContentStream
+from PyPDF2.generic import (
+    ArrayObject, DecodedStreamObject, DictionaryObject, FloatObject, IndirectObject, NameObject
+)
+
+# Page attributes a page may inherit from its parents
+INHERITED = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+
+def _clone(obj):
+    "Copy the containers of a PDF object, the indirect references are kept"
+    if isinstance(obj, DictionaryObject):
+        # copy.copy keeps the class and the stream data of stream objects
+        new = copy.copy(obj)
+        for key, value in obj.items():
+            new[key] = _clone(value)
+        return new
+    if isinstance(obj, ArrayObject):
+        return ArrayObject(_clone(value) for value in obj)
+    return obj
+
+
+class _ObjectSource:
+    """The resolved objects of the template, in place of the PdfFileReader.
+
+    The indirect references of the cloned page point here; getObject returns
+    a fresh clone so PdfFileWriter can rewrite references in it freely.
+    """
+
+    def __init__(self, reader, root):
+        self._objects = {} # (idnum, generation) -> resolved object
+        self.root = self._resolve(reader, root, skip=('/Parent',))
+
+    def _resolve(self, reader, obj, skip=()):
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            if key not in self._objects:
+                self._objects[key] = None # reserve the key, the object graph may have cycles
+                self._objects[key] = self._resolve(reader, reader.getObject(obj))
+            return IndirectObject(obj.idnum, obj.generation, self)
+        if isinstance(obj, DictionaryObject):
+            for key in list(obj.keys()):
+                if key in skip:
+                    del obj[key]
+                else:
+                    obj[key] = self._resolve(reader, obj.raw_get(key))
+            return obj
+        if isinstance(obj, ArrayObject):
+            for i in range(len(obj)):
+                obj[i] = self._resolve(reader, obj[i])
+            return obj
+        return obj
+
+    def getObject(self, indirect):
+        return _clone(self._objects[(indirect.idnum, indirect.generation)])
+
+
+class DrawingTemplate:
+    "The first page of a template PDF, parsed once"
+
+    def __init__(self, fileName):
+        stat = os.stat(fileName)
+        self.fileName = fileName
+        self.signature = (stat.st_mtime, stat.st_size)
+
+        # Read the whole file so no handle stays open
+        with open(fileName, 'rb') as f:
+            reader = PdfFileReader(io.BytesIO(f.read()), strict=False)
+        page = reader.getPage(0)
+        self.mediaBox = page.mediaBox
+
+        # The page is cloned without its parent, so copy the attributes it inherits
+        parent = page.get('/Parent')
+        while parent is not None:
+            parent = parent.getObject()
+            for key in INHERITED:
+                if key not in page and key in parent:
+                    page[NameObject(key)] = parent.raw_get(key)
+            parent = parent.get('/Parent')
+
+        # The content stream is decoded once, isolated in its own graphics state and compressed once
+        contents = page.getContents()
+        if isinstance(contents, ArrayObject):
+            data = b'\n'.join(stream.getObject().getData() for stream in contents)
+        else:
+            data = contents.getData()
+        content = DecodedStreamObject()
+        content.setData(b'q\n' + data + b'\nQ\n')
+        self._content = content.flateEncode()
+
+        self._source = _ObjectSource(reader, page)
+        self._page = self._source.root
+
+    def page(self):
+        "A clone of the template page"
+        page = PageObject(None)
+        for key, value in self._page.items():
+            page[key] = _clone(value)
+        page[NameObject('/Contents')] = ArrayObject([copy.copy(self._content)])
+        return page
+
+    def stamped_page(self, stamp):
+        """A clone of the template page with the stamp page drawn on top.
+
+        Equivalent to page().mergePage(stamp) without parsing the content of
+        the template again.
+        """
+        page = self.page()
+        resources = DictionaryObject()
+        rename = {}
+        templateResources = page[NameObject('/Resources')].getObject()
+        stampResources = stamp[NameObject('/Resources')].getObject()
+        for res in '/ExtGState', '/Font', '/XObject', '/ColorSpace', '/Pattern', '/Shading', '/Properties':
+            new, newRename = PageObject._mergeResources(templateResources, stampResources, res)
+            if new:
+                resources[NameObject(res)] = new
+                rename.update(newRename)
+        resources[NameObject('/ProcSet')] = ArrayObject(
+            frozenset(templateResources.get('/ProcSet', ArrayObject()).getObject()).union(
+                frozenset(stampResources.get('/ProcSet', ArrayObject()).getObject())
+            )
+        )
+
+        stampContent = stamp.getContents()
+        if stampContent is not None:
+            # Clip the stamp to its trim box, like PageObject.mergePage does
+            stampContent = ContentStream(stampContent, stamp.pdf)
+            box = stamp.trimBox
+            stampContent.operations.insert(0, [[FloatObject(value) for value in (box.getLowerLeft_x(), box.getLowerLeft_y(), box.getWidth(), box.getHeight())], 're'])
+            stampContent.operations.insert(1, [[], 'W'])
+            stampContent.operations.insert(2, [[], 'n'])
+            stampContent = PageObject._contentStreamRename(stampContent, rename, stamp.pdf)
+            page[NameObject('/Contents')].append(PageObject._pushPopGS(stampContent, stamp.pdf))
+
+        page[NameObject('/Resources')] = resources
+        return page
+
+
+class TemplateCache:
+    "DrawingTemplate of each file, reloaded when the file changes"
+
+    def __init__(self):
+        self._templates = {} # file name -> DrawingTemplate
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self, fileName):
+        stat = os.stat(fileName)
+        with self._lock:
+            template = self._templates.get(fileName)
+            if template is None or template.signature != (stat.st_mtime, stat.st_size):
+                template = DrawingTemplate(fileName)
+                self._templates[fileName] = template
+                self.loads += 1
+            return template
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
@@ -0,0 +1,147 @@
+# Background pool for the file stages of the exports.
+#
+# Writing a BOM with xlwt and stamping a drawing with reportlab and PyPDF2 is
+# pure Python and doesn't touch the Fusion 360 API, so it runs on worker
+# threads and the UI stays responsive. Fusion 360 objects may only be used
+# from the UI thread: a worker fires a custom event when its job is done,
+# and the event handler updates the progress bar and calls the completion
+# callback on the UI thread.
+
+import adsk.core, traceback
+import concurrent.futures
+import itertools
+import json
+import threading
+import time
+
+from ..lib import fusion360utils as futil
+from .. import config
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+EVENT_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_ExportJobDone'
+
+# Local list of event handlers used to maintain a reference so
+# they are not released and garbage collected.
+local_handlers = []
+
+_executor = None
+_jobs = {} # job id -> ExportJob, until its completion is handled
+_job_ids = itertools.count()
+_lock = threading.Lock()
+_progress = {'done': 0, 'total': 0}
+_failures = [] # what went wrong since the queue was last empty, reported once it drains
+
+
+class ExportJob:
+    def __init__(self, name, callback):
+        self.id = next(_job_ids)
+        self.name = name
+        self.callback = callback
+        self.result = None
+        self.error = None # the formatted traceback if the job failed
+        self.elapsed = 0.0 # seconds spent on the worker
+
+
+def start():
+    global _executor
+    _executor = concurrent.futures.ThreadPoolExecutor(max_workers=config.EXPORT_WORKERS, thread_name_prefix='DeepClawExport')
+    customEvent = app.registerCustomEvent(EVENT_ID)
+    futil.add_handler(customEvent, _job_done, local_handlers=local_handlers)
+
+
+def stop():
+    global _executor
+    if _executor:
+        _executor.shutdown(wait=True)
+        _executor = None
+    app.unregisterCustomEvent(EVENT_ID)
+    local_handlers.clear()
+    _jobs.clear()
+    _failures.clear()
+
+
+def submit(name, function, *args, callback=None):
+    """Run function(*args) on a worker thread.
+
+    The function must not use the Fusion 360 API. callback(job) is called on
+    the UI thread once the job is done, with job.result or job.error set.
+    """
+    job = ExportJob(name, callback)
+    with _lock:
+        _jobs[job.id] = job
+    _progress['total'] += 1
+    _show_progress()
+    _executor.submit(_run, job, function, args)
+    return job
+
+
+def pending():
+    "Number of jobs whose completion hasn't been handled yet"
+    with _lock:
+        return len(_jobs)
+
+
+def _run(job, function, args):
+    start = time.perf_counter()
+    try:
+        job.result = function(*args)
+    except:
+        job.error = traceback.format_exc()
+    job.elapsed = time.perf_counter() - start
+    # Hand the job back to the UI thread
+    app.fireCustomEvent(EVENT_ID, json.dumps({'job': job.id}))
+
+
+def _job_done(args: adsk.core.CustomEventArgs):
+    jobId = json.loads(args.additionalInfo)['job']
+    with _lock:
+        job = _jobs.pop(jobId, None)
+    if job is None:
+        return
+
+    _progress['done'] += 1
+    if job.error:
+        futil.log(f'Export {job.name} failed\n{job.error}', adsk.core.LogLevels.ErrorLogLevel)
+        _failures.append(f'{job.name}: {_last_line(job.error)}')
+    else:
+        futil.log(f'Export {job.name} done in {job.elapsed:.2f}s')
+
+    # A failing callback mustn't keep the next jobs from being handled
+    if job.callback:
+        try:
+            job.callback(job)
+        except:
+            error = traceback.format_exc()
+            futil.log(f'Export {job.name} callback failed\n{error}', adsk.core.LogLevels.ErrorLogLevel)
+            _failures.append(f'{job.name} completion: {_last_line(error)}')
+
+    if pending() == 0:
+        ui.progressBar.hide()
+        _progress['done'] = 0
+        _progress['total'] = 0
+        _report_failures()
+    else:
+        _show_progress()
+
+
+def _last_line(error):
+    "The exception line of a formatted traceback"
+    return error.strip().splitlines()[-1]
+
+
+def _report_failures():
+    "Show every failure of the drained queue in one message, the tracebacks are in the log"
+    if not _failures:
+        return
+    message = f'{len(_failures)} export steps failed, see the log for details:\n' + '\n'.join(_failures)
+    _failures.clear()
+    ui.messageBox(message)
+
+
+def _show_progress():
+    progressBar = ui.progressBar
+    if not progressBar.isShowing:
+        progressBar.show('Exporting %v of %m files', 0, _progress['total'])
+    progressBar.maximumValue = _progress['total']
+    progressBar.progressValue = _progress['done']
@@ -17,11 +17,26 @@ DEBUG = True
 ADDIN_NAME = os.path.basename(os.path.dirname(__file__))
 COMPANY_NAME = 'SUSTech'
 
-BASE_DEPTH = 0 # The Depth of DeepClaw Base
-BASE_LENGTH = 0 # The Lenght of DeepClaw Base
-BASE_HEIGHT = 0 # The Height of DeepClaw Base
+# The parameters of the pedestals are stored in the designs, see commands/buildPedestal/state.py
 
-IS_DCBASE_GENERATE = False # The state of the model generation
+# Number of worker threads writing the BOM and drawing files in the background
+EXPORT_WORKERS = 2
+
+# Design mode the pedestals are built in:
+# 'parametric' keeps the timeline so the pedestals can be updated later, the
+# design is only computed once after all the parts are placed.
+# 'direct' turns the design into a direct design before building, which is
+# faster but removes the timeline of the design for good and the pedestals
+# can only be rebuilt, not updated.
+BUILD_DESIGN_TYPE = 'parametric'
+
+# Number of timed steps kept for export, see lib/fusion360utils/timing_utils.py
+TIMING_BUFFER_SIZE = 1000
+# Compute the design after each outermost timed step, like a whole build or
+# export, to record the compute time. This changes what gets measured: the
+# extra computes aren't part of a normal session and change the state the
+# next steps start from, so only turn it on to profile the add-in.
+TIMING_COMPUTE = False
 DRAWING_NAME = ""
 BOM_FILE = ""
 
@@ -1,2 +1,4 @@
 from .general_utils import *
 from .event_utils import *
+from .import_utils import *
+from .timing_utils import *
@@ -19,13 +19,25 @@ from .general_utils import handle_error
 # Global Variable to hold Event Handlers
 _handlers = []
 
+# Event class -> handler base class, resolved from the annotations of its add method
+_handler_types = {}
+# Handler base class -> the Handler subclass calling its callback
+_handler_classes = {}
+
+# [command, handlers] of the commands which aren't destroyed yet
+_command_handlers = []
+# The handlers of the last destroyed command, kept until the next one is
+# destroyed because its destroy event may still be notifying them
+_released_handlers = []
+
 
 def add_handler(
         event: adsk.core.Event,
         callback: Callable,
         *,
         name: str = None,
-        local_handlers: list = None
+        local_handlers: list = None,
+        command: adsk.core.Command = None
 ):
     """Adds an event handler to the specified event.
 
@@ -42,22 +54,73 @@ def add_handler(
                       be cleared using the clear_handlers function. You may want
                       to maintain your own handler list so it can be managed 
                       independently for each command.
+    command -- The command the event belongs to. The handler is kept until
+               the command is destroyed and then released, use it for the
+               events connected in a commandCreated handler. This argument
+               must be specified by its keyword.
 
     :returns:
         The event handler that was created.  You don't often need this reference, but it can be useful in some cases.
     """   
-    module = sys.modules[event.__module__]
-    handler_type = module.__dict__[event.add.__annotations__['handler']]
-    handler = _create_handler(handler_type, callback, event, name, local_handlers)
+    if command is not None:
+        local_handlers = _handlers_of(command)
+    handler = _create_handler(_handler_type(event), callback, event, name, local_handlers)
     event.add(handler)
     return handler
 
 
 def clear_handlers():
-    """Clears the global list of handlers.
+    """Clears the global list of handlers and the handlers of the live commands.
     """
     global _handlers
     _handlers = []
+    _command_handlers.clear()
+    _released_handlers.clear()
+
+
+def handler_counts():
+    """The number of handlers kept alive by the registry.
+
+    :returns:
+        A dict with the global handlers, the live commands, their handlers
+        and the handler classes defined so far.
+    """
+    return {
+        'global': len(_handlers),
+        'commands': len(_command_handlers),
+        'command_handlers': sum(len(handlers) for command, handlers in _command_handlers),
+        'classes': len(_handler_classes),
+    }
+
+
+def _handler_type(event: adsk.core.Event):
+    event_type = type(event)
+    handler_type = _handler_types.get(event_type)
+    if handler_type is None:
+        module = sys.modules[event.__module__]
+        handler_type = module.__dict__[event.add.__annotations__['handler']]
+        _handler_types[event_type] = handler_type
+    return handler_type
+
+
+def _handlers_of(command: adsk.core.Command):
+    for entry in _command_handlers:
+        if entry[0] == command:
+            return entry[1]
+
+    handlers = []
+    entry = [command, handlers]
+    _command_handlers.append(entry)
+
+    def release(args):
+        if entry in _command_handlers:
+            _command_handlers.remove(entry)
+        _released_handlers[:] = handlers
+
+    # Registered first, so it is notified before the other destroy handlers of the command
+    _create_handler(_handler_type(command.destroy), release, command.destroy, 'release handlers', handlers)
+    command.destroy.add(handlers[-1])
+    return handlers
 
 
 def _create_handler(
@@ -67,22 +130,27 @@ def _create_handler(
         name: str = None,
         local_handlers: list = None
 ):
-    handler = _define_handler(handler_type, callback, name)()
+    handler = _define_handler(handler_type)(callback, name or handler_type.__name__)
     (local_handlers if local_handlers is not None else _handlers).append(handler)
     return handler
 
 
-def _define_handler(handler_type, callback, name: str = None):
-    name = name or handler_type.__name__
+def _define_handler(handler_type):
+    handler_class = _handler_classes.get(handler_type)
+    if handler_class is not None:
+        return handler_class
 
     class Handler(handler_type):
-        def __init__(self):
+        def __init__(self, callback, name):
             super().__init__()
+            self.callback = callback
+            self.name = name
 
         def notify(self, args):
             try:
-                callback(args)
+                self.callback(args)
             except:
-                handle_error(name)
+                handle_error(self.name)
 
+    _handler_classes[handler_type] = Handler
     return Handler
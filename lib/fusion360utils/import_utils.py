@@ -0,0 +1,47 @@
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+
+from .general_utils import log
+
+_import_times = {} # module name -> seconds spent importing it
+_import_lock = threading.Lock()
+
+
+def timed_import(name: str, package: str = None):
+    """Import a module and record how long its first import took.
+
+    Use it to load heavy libraries when they are first needed instead of when
+    the add-in starts, and to measure the cost of the command modules.
+
+    Arguments:
+    name -- The module name, relative names need the package argument.
+    package -- The package relative names are resolved from, usually __package__.
+    """
+    fullName = importlib.util.resolve_name(name, package) if name.startswith('.') else name
+    loaded = fullName in sys.modules
+    start = time.perf_counter()
+    # import_module also waits for a module another thread is still importing
+    module = importlib.import_module(fullName)
+    if not loaded:
+        with _import_lock:
+            _import_times.setdefault(fullName, time.perf_counter() - start)
+    return module
+
+
+def import_times():
+    """The seconds spent importing each module loaded with timed_import.
+
+    The cost of a module includes the modules it imports itself.
+    """
+    with _import_lock:
+        return dict(_import_times)
+
+
+def log_import_times(title: str = 'Import times'):
+    """Write the import cost of each module, slowest first, to the log."""
+    times = sorted(import_times().items(), key=lambda item: item[1], reverse=True)
+    lines = [f'{title}:'] + [f'  {seconds * 1000:8.1f} ms  {name}' for name, seconds in times]
+    log('\n'.join(lines))
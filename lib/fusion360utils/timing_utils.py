@@ -0,0 +1,156 @@
+import collections
+import contextlib
+import csv
+import functools
+import json
+import os
+import threading
+import time
+from typing import NamedTuple
+
+import adsk.core, adsk.fusion
+from .general_utils import log
+
+app = adsk.core.Application.get()
+
+# Attempt to read the timing settings from parent config.
+try:
+    from ... import config
+    TIMING_BUFFER_SIZE = config.TIMING_BUFFER_SIZE
+    TIMING_COMPUTE = config.TIMING_COMPUTE
+except:
+    TIMING_BUFFER_SIZE = 1000
+    TIMING_COMPUTE = False
+
+
+class TimingRecord(NamedTuple):
+    name: str
+    start: float    # time.time() when the step started
+    wall: float     # seconds
+    compute: float  # seconds spent in design.computeAll() after the step, 0 unless TIMING_COMPUTE and outermost
+    failed: bool    # the step raised an exception
+    thread: str
+
+
+# The latest records, the oldest are dropped once the buffer is full
+_records = collections.deque(maxlen=TIMING_BUFFER_SIZE)
+# name -> [calls, wall, compute], never dropped
+_totals = {}
+_timing_lock = threading.Lock()
+# Depth of the timed steps running on each thread
+_nesting = threading.local()
+
+
+def _compute_time():
+    "Time a full compute of the active design, only possible on the UI thread"
+    if threading.current_thread() is not threading.main_thread():
+        return 0.0
+    design = adsk.fusion.Design.cast(app.activeProduct)
+    if not design:
+        return 0.0
+    start = time.perf_counter()
+    design.computeAll()
+    return time.perf_counter() - start
+
+
+@contextlib.contextmanager
+def timed(name: str):
+    """Context manager recording the wall time of a step.
+
+    When config.TIMING_COMPUTE is True the design is computed at the end of
+    the outermost timed step and the compute time is recorded too. The
+    nested steps aren't computed, as that would undo the deferred compute
+    of batchedCompute. It makes the steps slower, so it is meant for
+    profiling sessions only.
+
+    Arguments:
+    name -- The name the step is recorded under.
+    """
+    depth = getattr(_nesting, 'depth', 0)
+    _nesting.depth = depth + 1
+    started = time.time()
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        wall = time.perf_counter() - start
+        _nesting.depth = depth
+        compute = _compute_time() if TIMING_COMPUTE and not failed and depth == 0 else 0.0
+        record = TimingRecord(name, started, wall, compute, failed, threading.current_thread().name)
+        with _timing_lock:
+            _records.append(record)
+            totals = _totals.setdefault(name, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += wall
+            totals[2] += compute
+
+
+def timed_function(name: str = None):
+    """Decorator recording every call of a function with timed.
+
+    Arguments:
+    name -- The name the calls are recorded under, the function name by default.
+    """
+    def decorator(function):
+        stepName = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timed(stepName):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timing_records():
+    """The latest timing records, oldest first."""
+    with _timing_lock:
+        return list(_records)
+
+
+def timing_summary():
+    """The call count, total and mean times of each step, since the add-in started."""
+    with _timing_lock:
+        totals = {name: list(values) for name, values in _totals.items()}
+    return {
+        name: {'calls': calls, 'wall': wall, 'compute': compute, 'mean_wall': wall / calls}
+        for name, (calls, wall, compute) in totals.items()
+    }
+
+
+def clear_timings():
+    with _timing_lock:
+        _records.clear()
+        _totals.clear()
+
+
+def export_timings(filename: str):
+    """Write the timing records to a .csv file, or to a .json file with the summary.
+
+    Arguments:
+    filename -- The file to write, its extension selects the format.
+    """
+    records = timing_records()
+    if os.path.splitext(filename)[1].lower() == '.json':
+        with open(filename, 'w') as f:
+            json.dump({
+                'summary': timing_summary(),
+                'records': [record._asdict() for record in records],
+            }, f, indent=2)
+    else:
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(TimingRecord._fields)
+            writer.writerows(records)
+
+
+def log_timings(title: str = 'Timings'):
+    """Write the summary of the timed steps, slowest first, to the log."""
+    summary = sorted(timing_summary().items(), key=lambda item: item[1]['wall'], reverse=True)
+    lines = [f'{title}:'] + [
+        f"  {values['wall']:8.3f} s  {values['compute']:8.3f} s compute  {values['calls']:5d} calls  {name}"
+        for name, values in summary
+    ]
+    log('\n'.join(lines))
@@ -0,0 +1,18 @@
+# The tests cover the modules which don't import adsk: the planners of
+# buildPedestal and the vendored spreadsheet libraries. They are imported
+# from their own folders, the add-in package itself needs Fusion 360.
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path[:0] = [
+    os.path.join(ROOT, 'commands'),
+    os.path.join(ROOT, 'commands', 'exportBOM', 'Modules'),
+]
+
+
+def pytest_addoption(parser):
+    parser.addoption('--update-snapshots', action='store_true',
+                     help='Save the current plans as the snapshots instead of comparing them')
@@ -0,0 +1,26 @@
+import itertools
+
+import pytest
+
+from buildPedestal import clearance, plan
+
+
+def test_reference_pedestal_can_be_built():
+    assert clearance.check_pedestal(*clearance.REFERENCE_DIMENSIONS) == []
+
+
+def test_limits_can_be_built():
+    # Every corner of the allowed dimensions, the minimums are the tightest fits
+    limits = [clearance.DIMENSION_LIMITS[name] for name in plan.DIMENSIONS]
+    for dimensions in itertools.product(*limits):
+        assert clearance.check_pedestal(*dimensions) == [], dimensions
+
+
+@pytest.mark.parametrize('dimensions, problem', [
+    ((60.0, 80.0, 0.5), 'The height must be between 12 and 200 cm'),
+    ((51.9, 80.0, 70.0), 'The depth must be between 52 and 200 cm'),
+    ((60.0, 250.0, 70.0), 'The length must be between 60 and 200 cm'),
+    ((60.0, 80.0, float('nan')), 'The height must be between 12 and 200 cm'),
+])
+def test_dimensions_out_of_limits_are_reported(dimensions, problem):
+    assert clearance.check_pedestal(*dimensions) == [problem]
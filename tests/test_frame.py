@@ -0,0 +1,47 @@
+import pytest
+
+from buildPedestal import clearance, frame
+
+RECTANGLE = (
+    {'a': (0, 0, 0), 'b': (100, 0, 0), 'c': (0, 0, 80), 'd': (100, 0, 80)},
+    [('a', 'b'), ('c', 'd'), ('a', 'c'), ('b', 'd')],
+)
+
+# The 12 edges of a 60 cm cube
+CUBE = (
+    {f'n{i}': ((i & 1) * 60, (i >> 1 & 1) * 60, (i >> 2 & 1) * 60) for i in range(8)},
+    [(f'n{i}', f'n{i | bit}') for i in range(8) for bit in (1, 2, 4) if not i & bit],
+)
+
+
+@pytest.mark.parametrize('description', [RECTANGLE, CUBE], ids=['rectangle', 'cube'])
+def test_brackets_only_touch_the_beams(description):
+    framePlan = frame.plan_frame(*description)
+    assert clearance.check_frame(framePlan) == []
+    # Every bracket is keyed into the two beams of its corner
+    beams = {beam.role for beam in framePlan.beams}
+    found = clearance.interferences(framePlan)
+    for occ in framePlan.occurrences:
+        if occ.component == 'bracket':
+            touching = [f for f in found if occ.role in (f.a, f.b) and (f.a in beams or f.b in beams)]
+            assert len(touching) == 2
+            assert all(f.depth == pytest.approx(clearance.BRACKET_KEY_DEPTH) for f in touching)
+
+
+def test_rectangle_brackets_sit_in_the_corners():
+    framePlan = frame.plan_frame(*RECTANGLE)
+    boxes = {box.role: box for box in clearance.boxes(framePlan)}
+    # Corner a: beam1 runs along +x, it butts against beam3 running through the joint along z
+    bracket = boxes['bracket1']
+    assert bracket.low == pytest.approx((3.7, -3.9, 3.7))
+    assert bracket.high == pytest.approx((11.8, 3.9, 12.55))
+    # The brackets are centered on the plane of the frame
+    for box in boxes.values():
+        if box.component == 'bracket':
+            assert box.low[1] == pytest.approx(-box.high[1])
+
+
+def test_overlapping_beams_are_reported():
+    nodes = {'a': (0, 0, 0), 'b': (100, 0, 0), 'c': (50, 0, 0), 'd': (150, 0, 0)}
+    problems = clearance.check_frame(frame.plan_frame(nodes, [('a', 'b'), ('c', 'd')]))
+    assert problems == ['beam1 and beam2 overlap by 8.0 cm']
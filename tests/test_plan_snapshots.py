@@ -0,0 +1,91 @@
+# Compare the pedestal plans with the snapshots saved in tests/snapshots.
+#
+# A change of the planner that moves a part, renames a component or changes
+# the BOM shows up as a snapshot difference. When the change is intended,
+# regenerate the snapshots with
+#     python -m pytest tests/test_plan_snapshots.py --update-snapshots
+# and review the diff of the JSON files.
+
+import json
+import math
+import os
+
+import pytest
+
+from buildPedestal import plan
+
+SNAPSHOT_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshots')
+
+# (depth, length, height) of the saved plans, the first one is the reference pedestal
+DIMENSIONS = [
+    (60.0, 80.0, 70.0),
+    (45.0, 120.0, 30.5),
+    (100.0, 60.0, 150.0),
+]
+
+# Digits of the saved transforms
+DIGITS = 9
+
+
+def snapshot_path(dimensions):
+    return os.path.join(SNAPSHOT_FOLDER, 'pedestal_%g_%g_%g.json' % dimensions)
+
+
+def _rounded(value):
+    if isinstance(value, float):
+        return round(value, DIGITS) + 0.0 # no -0.0 in the files
+    if isinstance(value, (list, tuple)):
+        return [_rounded(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _rounded(item) for key, item in value.items()}
+    return value
+
+
+def snapshot(pedestalPlan):
+    "The plan as JSON values"
+    return _rounded({
+        'dimensions': [pedestalPlan.depth, pedestalPlan.length, pedestalPlan.height],
+        'components': [comp._asdict() for comp in pedestalPlan.components],
+        'occurrences': [occ._asdict() for occ in pedestalPlan.occurrences],
+        'bom': [line._asdict() for line in pedestalPlan.bom],
+    })
+
+
+def _differences(expected, actual, path='plan'):
+    "Paths where the values differ, floats are compared with a tolerance"
+    if isinstance(expected, float) or isinstance(actual, float):
+        if isinstance(expected, (int, float)) and isinstance(actual, (int, float)) \
+                and math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-7):
+            return []
+        return [f'{path}: {expected!r} != {actual!r}']
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [f'{path}: {len(expected)} items != {len(actual)} items']
+        return [diff for i, (e, a) in enumerate(zip(expected, actual)) for diff in _differences(e, a, f'{path}[{i}]')]
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        if expected.keys() != actual.keys():
+            return [f'{path}: keys {sorted(expected)} != {sorted(actual)}']
+        return [diff for key in expected for diff in _differences(expected[key], actual[key], f'{path}.{key}')]
+    return [] if expected == actual else [f'{path}: {expected!r} != {actual!r}']
+
+
+@pytest.mark.parametrize('dimensions', DIMENSIONS, ids=lambda dims: '%gx%gx%g' % dims)
+def test_plan_matches_snapshot(dimensions, request):
+    if request.config.getoption('update_snapshots'):
+        write_snapshot(dimensions)
+    with open(snapshot_path(dimensions)) as f:
+        expected = json.load(f)
+    actual = json.loads(json.dumps(snapshot(plan.plan_pedestal(*dimensions))))
+    differences = _differences(expected, actual)
+    assert not differences, '\n'.join(differences[:20])
+
+
+def test_cached_plan_is_the_plan():
+    assert plan.cached_plan(*DIMENSIONS[0]) == plan.plan_pedestal(*DIMENSIONS[0])
+
+
+def write_snapshot(dimensions):
+    os.makedirs(SNAPSHOT_FOLDER, exist_ok=True)
+    with open(snapshot_path(dimensions), 'w') as f:
+        json.dump(snapshot(plan.plan_pedestal(*dimensions)), f, indent=1)
+        f.write('\n')
@@ -0,0 +1,52 @@
+# The RK encoding of xlwt against the decoding of xlrd, value by value.
+
+import math
+import struct
+
+import pytest
+
+from xlwt.Cell import _rk_encode
+from xlrd.sheet import unpack_RK
+
+INTEGERS = [0.0, 1.0, -1.0, 42.0, 0x1FFFFFFF, -0x20000000]
+HUNDREDTHS = [1.5, -2.25, 0.1, 12.34, 5368709.11, -5368709.12]
+FLOATS = [0x20000000, 2.0 ** 40, -2.0 ** 40, 3 * 2.0 ** 100, 2.0 ** -30, -0.0, math.inf, -math.inf]
+
+# Too many significant bits for any variety: 1e9 is past the 30-bit
+# integers and needs 21 bits of mantissa where the float RK keeps 19
+NOT_ENCODED = [1e9, 1 / 3, 123456.789, 1e300 / 3, 5368709.123, 2.0 ** 40 + 1]
+
+
+def decode(rk):
+    return unpack_RK(struct.pack('<i', rk))
+
+
+def same(a, b):
+    "Equal values with the same sign, -0.0 isn't 0.0"
+    return a == b and math.copysign(1.0, a) == math.copysign(1.0, b)
+
+
+@pytest.mark.parametrize('value', INTEGERS)
+def test_integers(value):
+    rk = _rk_encode(value)
+    assert rk & 3 == 2
+    assert same(decode(rk), value)
+
+
+@pytest.mark.parametrize('value', HUNDREDTHS)
+def test_hundredths(value):
+    rk = _rk_encode(value)
+    assert rk & 3 == 3
+    assert same(decode(rk), value)
+
+
+@pytest.mark.parametrize('value', FLOATS)
+def test_floats(value):
+    rk = _rk_encode(value)
+    assert rk & 3 == 0
+    assert same(decode(rk), value)
+
+
+@pytest.mark.parametrize('value', NOT_ENCODED)
+def test_not_encoded(value):
+    assert _rk_encode(value) is None
@@ -0,0 +1,23 @@
+from types import SimpleNamespace
+
+from buildPedestal import state
+
+
+def _pedestal(name):
+    return SimpleNamespace(component=SimpleNamespace(name=name))
+
+
+def test_file_names_are_sanitized_and_numbered():
+    names = ['Pedestal A', 'A/1', 'A_1', 'a_1', 'A_1_2', 'A_1']
+    assert state.file_names(names) == ['Pedestal_A', 'A_1', 'A_1_2', 'a_1_3', 'A_1_2_2', 'A_1_4']
+
+
+def test_export_names_ignore_case():
+    pedestals = [_pedestal('Pedestal A'), _pedestal('pedestal a')]
+    names = [name for pedestal, name in state.export_names(pedestals, '/out/BOM.xls')]
+    assert names == ['/out/BOM_Pedestal_A.xls', '/out/BOM_pedestal_a_2.xls']
+
+
+def test_single_pedestal_keeps_the_chosen_file():
+    pedestal = _pedestal('Pedestal A')
+    assert state.export_names([pedestal], '/out/BOM.xls') == [(pedestal, '/out/BOM.xls')]